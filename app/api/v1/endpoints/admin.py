@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Depends, HTTPException
+
+from app.api.v1.endpoints.clients import get_current_active_user
+from app.core.db_pool import pool_status
+from app.core.metrics import metrics
+from app.models.auth import User, UserRole
+
+router = APIRouter(prefix="/admin", tags=["admin"])
+
+def require_admin(current_user: User = Depends(get_current_active_user)) -> User:
+    if current_user.role not in [UserRole.superadmin, UserRole.admin]:
+        raise HTTPException(status_code=403, detail="Not authorized")
+    return current_user
+
+@router.get("/metrics")
+def get_metrics(current_user: User = Depends(require_admin)):
+    """Process-local metrics of the worker that served this request."""
+    return metrics.snapshot()
+
+@router.get("/db-pool")
+def get_db_pool_status(current_user: User = Depends(require_admin)):
+    """Checked-out/idle/overflow connections and checkout wait times for this worker."""
+    return pool_status()
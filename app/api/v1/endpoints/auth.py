@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt
 from app.core.settings import settings
 from app.core.database import get_db
@@ -10,15 +10,16 @@ from app.services.auth import AuthService
 router = APIRouter()
 
 @router.post("/register", status_code=status.HTTP_201_CREATED)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
-    return AuthService.register_user(db, user_data)
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
+    return await AuthService.register_user(db, user_data)
 
 @router.post("/login")
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
-    return AuthService.login_user(db, login_data)
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
+    return await AuthService.login_user(db, login_data)
 
+# logout only does blocking Redis I/O, so it runs on the threadpool
 @router.post("/logout")
-async def logout(token: str = Depends(oauth2_scheme)):
+def logout(token: str = Depends(oauth2_scheme)):
     
     payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
     jti = payload.get("jti")
@@ -31,7 +32,7 @@ async def logout(token: str = Depends(oauth2_scheme)):
 @router.get("/me")
 async def get_current_user_info(
     token: str = Depends(oauth2_scheme),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
-    user_info = AuthService.get_current_user(db, token)
+    user_info = await AuthService.get_current_user(db, token)
     return {"user": user_info}
\ No newline at end of file
@@ -1,49 +1,58 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
 from app.core.database import get_db
-from app.core.security import get_current_user, verify_token, credentials_exception, oauth2_scheme 
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.responses import ListSerializer
+from app.core.security import get_current_user, credentials_exception, TokenData
 from app.models.auth import User
 from app.schemas.clients import ClientCreate, ClientResponse, ClientStatusUpdate
 from app.services.clients import ClientService
 
 router = APIRouter(prefix="/clients", tags=["clients"])
 
-def get_current_active_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+client_list = ListSerializer(ClientResponse)
+
+async def get_current_active_user(
+    token_data: TokenData = Depends(get_current_user),  # sync, runs on the threadpool
+    db: AsyncSession = Depends(get_db)
+) -> User:
     """Get full user object from token"""
-    token_data = verify_token(token, credentials_exception)
-    
     # Get user from database using email from token
-    user = db.query(User).filter(User.email == token_data.username).first()
+    user = await db.scalar(select(User).where(User.email == token_data.username))
     if not user:
         raise credentials_exception
     
     return user
 
 @router.post("/", response_model=ClientResponse)
-def create_client(
+async def create_client(
     client_data: ClientCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)  # Use the new function
 ):
-    return ClientService.create_client(db, client_data, current_user)
+    return await ClientService.create_client(db, client_data, current_user)
 
 # Update other endpoints to use get_current_active_user too
 @router.get("/", response_model=List[ClientResponse])
-def get_clients(
+async def get_clients(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header; overrides skip"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    return ClientService.get_clients(db, current_user, skip, limit)
+    page = await ClientService.get_clients(db, current_user, skip, limit, cursor)
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    return client_list.response(page.items, headers)
 
 @router.patch("/{client_id}/status", response_model=ClientResponse)
-def update_client_status(
+async def update_client_status(
     client_id: int,
     status_data: ClientStatusUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_active_user)
 ):
-    return ClientService.update_client_status(db, client_id, status_data.active, current_user)
\ No newline at end of file
+    return await ClientService.update_client_status(db, client_id, status_data.active, current_user)
\ No newline at end of file
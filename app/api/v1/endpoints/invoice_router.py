@@ -1,25 +1,34 @@
 # app/api/v1/endpoints/invoice_router.py
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query, Response
 from fastapi.responses import FileResponse
-from sqlalchemy.orm import Session
-from typing import List
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
 import os
 import uuid
 from datetime import date
 import json
 
-from app.core.database import get_db
+from app.core.database import get_db, get_primary_db
+from app.core.http_cache import conditional_get
+from app.core.pagination import NEXT_CURSOR_HEADER, keyset_paginate, make_page
+from app.core.response_cache import cached, invalidate
+from app.core.responses import ListSerializer, response_columns
 from app.core.security import get_current_user
 from app.models.auth import User
 from app.models.invoice import Invoice
 from app.schemas.invoice import InvoiceCreate, InvoiceOut
+from app.utils.file_store import invoice_store
 from app.utils.invoice_pdf import generate_invoice_pdf
+from app.utils.streaming import STREAM_BATCH_SIZE, ndjson_lines, ndjson_response
 
 router = APIRouter(
     prefix="/invoices",
     tags=["Invoices"]
 )
 
+invoice_list = ListSerializer(InvoiceOut)
+
 # --- Create Invoice (UPDATED for File Upload) ---
 @router.post("/", response_model=InvoiceOut)
 async def create_new_invoice(
@@ -27,7 +36,7 @@ async def create_new_invoice(
     client_id: int = Form(...),
     invoice_number: str = Form(...),
     months: str = Form(...),  # JSON string of months array
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
     """
@@ -45,19 +54,9 @@ async def create_new_invoice(
         except (json.JSONDecodeError, ValueError) as e:
             raise HTTPException(status_code=400, detail=f"Invalid months format: {str(e)}")
 
-        # Create uploads directory if it doesn't exist
-        upload_dir = "uploads/invoices"
-        os.makedirs(upload_dir, exist_ok=True)
-        
-        # Generate filename and path
-        file_extension = ".pdf"  # Force PDF extension
-        filename = f"{invoice_number}{file_extension}"
-        file_path = os.path.join(upload_dir, filename)
-        
-        # Save the uploaded PDF file
-        with open(file_path, "wb") as buffer:
-            content = await file.read()
-            buffer.write(content)
+        # Stream the uploaded PDF into the content-addressed store; a PDF
+        # identical to one already stored is kept once
+        stored = await invoice_store.save(file)
 
         # Save to DB (matching your existing Invoice model)
         new_invoice = Invoice(
@@ -65,54 +64,97 @@ async def create_new_invoice(
             client_id=client_id,
             months=months_str,  # Store as string like "January 2025, February 2025"
             created_date=date.today(),
-            file_path=file_path
+            file_path=stored.path,
+            file_sha256=stored.sha256,
+            file_size=stored.size
         )
         db.add(new_invoice)
-        db.commit()
-        db.refresh(new_invoice)
+        await db.commit()
+        await db.refresh(new_invoice)
+        await invalidate(f"invoice:{new_invoice.id}")
 
         return new_invoice
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=500, detail=f"Error creating invoice: {str(e)}")
 
-# --- Keep existing endpoints unchanged ---
-# --- List all invoices ---
-@router.get("/", response_model=List[InvoiceOut])
-def list_all_invoices(
-    db: Session = Depends(get_db),
+# --- List invoices ---
+@router.get("/", response_model=List[InvoiceOut], dependencies=[Depends(conditional_get("invoices"))])
+async def list_all_invoices(
+    client_id: Optional[int] = None,
+    created_from: Optional[date] = Query(None, description="Created on or after (YYYY-MM-DD)"),
+    created_to: Optional[date] = Query(None, description="Created on or before (YYYY-MM-DD)"),
+    month: Optional[date] = Query(None, description="Invoices billing this month (any day in it)"),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header; overrides skip"),
+    format: Literal["json", "ndjson"] = Query("json", description="ndjson streams every match, ignoring paging"),
+    db: AsyncSession = Depends(get_primary_db),
     current_user: User = Depends(get_current_user)
 ):
-    return db.query(Invoice).order_by(Invoice.created_date.desc()).all()
+    stmt = select(Invoice)
+    if client_id is not None:
+        stmt = stmt.where(Invoice.client_id == client_id)
+    if created_from is not None:
+        stmt = stmt.where(Invoice.created_date >= created_from)
+    if created_to is not None:
+        stmt = stmt.where(Invoice.created_date <= created_to)
+    if month is not None:
+        # months is stored as "January 2025, February 2025"
+        stmt = stmt.where(Invoice.months.contains(month.strftime("%B %Y")))
+
+    # Newest first, keyed on (created_date, id)
+    order = [Invoice.created_date, Invoice.id]
+
+    if format == "ndjson":
+        # Server-side cursor: memory stays flat however many invoices match
+        stmt = stmt.order_by(*[c.desc() for c in order]).execution_options(yield_per=STREAM_BATCH_SIZE)
+        result = await db.stream_scalars(stmt)
+        return ndjson_response(ndjson_lines(result, InvoiceOut))
+
+    stmt = stmt.with_only_columns(*response_columns(Invoice, InvoiceOut))
+    result = await db.execute(keyset_paginate(stmt, order, cursor, skip, limit, descending=True))
+    page = make_page(result.all(), limit, ["created_date", "id"])
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    return invoice_list.response(page.items, headers)
 
 # --- Get single invoice ---
 @router.get("/{invoice_id}", response_model=InvoiceOut)
-def get_invoice(
+@cached("invoice", tags=["invoice:{invoice_id}"], key="{invoice_id}", model=InvoiceOut)
+async def get_invoice(
     invoice_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_primary_db),
     current_user: User = Depends(get_current_user)
 ):
-    invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
+    invoice = await db.scalar(select(Invoice).where(Invoice.id == invoice_id))
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
     return invoice
 
 # --- Download PDF ---
 @router.get("/{invoice_id}/download")
-def download_invoice_pdf(
+async def download_invoice_pdf(
     invoice_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    invoice = db.query(Invoice).filter(Invoice.id == invoice_id).first()
+    invoice = await db.scalar(select(Invoice).where(Invoice.id == invoice_id))
     if not invoice:
         raise HTTPException(status_code=404, detail="Invoice not found")
+    if invoice.file_sha256:
+        # Redirect to the object store, or hand the file to nginx, where configured
+        return await invoice_store.download_response(invoice.file_sha256, f"{invoice.invoice_number}.pdf")
+
+    # Not yet moved into the store (app.scripts.migrate_invoice_files)
     if not invoice.file_path or not os.path.exists(invoice.file_path):
         raise HTTPException(status_code=404, detail="Invoice PDF not found")
 
     return FileResponse(
         path=invoice.file_path,
-        filename=os.path.basename(invoice.file_path),
+        filename=f"{invoice.invoice_number}.pdf",
         media_type='application/pdf'
     )
\ No newline at end of file
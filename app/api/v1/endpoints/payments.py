@@ -1,84 +1,142 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response, UploadFile, File
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import date
 
-from app.core.database import get_db
+from app.api.v1.endpoints.clients import get_current_active_user
+from app.core.database import get_db, get_primary_db
+from app.core.http_cache import conditional_get
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.response_cache import cached
+from app.core.responses import ListSerializer
 from app.core.security import get_current_user
 from app.models.auth import User
 from app.schemas.payments import (
     PaymentCreate, PaymentResponse, PaymentUpdate, 
-    PaymentStatsResponse
+    PaymentStatsResponse, PaymentRollupBucket, RollupGranularity, RollupGroupBy,
+    PaymentImportResponse, PaymentMethod
 )
 from app.services.payments import PaymentService
+from app.models.payments import PaymentMethod as PaymentMethodModel
+from app.utils.export import ExportFormat, export_response
+from app.utils.imports import read_rows
 
 router = APIRouter(prefix="/payments", tags=["payments"])
 
+payment_list = ListSerializer(PaymentResponse)
+
 @router.post("/", response_model=PaymentResponse)
-def create_payment(
+async def create_payment(
     payment_data: PaymentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return PaymentService.create_payment(db, payment_data, current_user)
+    return await PaymentService.create_payment(db, payment_data, current_user)
+
+@router.post("/import", response_model=PaymentImportResponse)
+async def import_payments(
+    file: UploadFile = File(..., description="CSV with a header row, or a JSON array; fields as in PaymentCreate"),
+    dry_run: bool = Query(False, description="Validate only, insert nothing"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    rows = read_rows(await file.read(), file.filename, file.content_type)
+    return await PaymentService.import_payments(db, rows, current_user, dry_run)
 
 @router.get("/", response_model=List[PaymentResponse])
-def get_payments(
+async def get_payments(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header; overrides skip"),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return PaymentService.get_payments(db, skip, limit)
+    page = await PaymentService.get_payments(db, skip, limit, cursor)
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    return payment_list.response(page.items, headers)
 
-@router.get("/stats", response_model=PaymentStatsResponse)
-def get_payment_stats(
-    db: Session = Depends(get_db),
+@router.get(
+    "/stats", response_model=PaymentStatsResponse,
+    # Served from the totals tables, which change with payments; users for client names
+    dependencies=[Depends(conditional_get("payment_client_totals", "payment_method_totals", "users"))]
+)
+@cached("payment_stats", tags=["payments"], model=PaymentStatsResponse)
+async def get_payment_stats(
+    db: AsyncSession = Depends(get_primary_db),
     current_user: User = Depends(get_current_user)
 ):
-    return PaymentService.get_payment_stats(db)
+    return await PaymentService.get_payment_stats(db)
 
 @router.get("/client/{client_id}", response_model=List[PaymentResponse])
-def get_payments_by_client(
+@cached("payments_by_client", tags=["client:{client_id}"], key="{client_id}")
+async def get_payments_by_client(
     client_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_primary_db),
     current_user: User = Depends(get_current_user)
 ):
-    return PaymentService.get_payments_by_client(db, client_id)
+    return payment_list.response(await PaymentService.get_payments_by_client(db, client_id))
 
 @router.get("/date-range", response_model=List[PaymentResponse])
-def get_payments_by_date_range(
+async def get_payments_by_date_range(
+    start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return payment_list.response(await PaymentService.get_payments_by_date_range(db, start_date, end_date))
+
+@router.get("/rollup", response_model=List[PaymentRollupBucket])
+async def get_payment_rollup(
     start_date: date = Query(..., description="Start date (YYYY-MM-DD)"),
     end_date: date = Query(..., description="End date (YYYY-MM-DD)"),
-    db: Session = Depends(get_db),
+    granularity: RollupGranularity = RollupGranularity.month,
+    group_by: RollupGroupBy = RollupGroupBy.none,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await PaymentService.get_payment_rollup(
+        db, start_date, end_date, granularity.value, group_by.value
+    )
+
+@router.get("/export")
+async def export_payments(
+    format: ExportFormat = "csv",
+    start_date: Optional[date] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end_date: Optional[date] = Query(None, description="End date (YYYY-MM-DD)"),
+    client_id: Optional[int] = None,
+    method: Optional[PaymentMethod] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return PaymentService.get_payments_by_date_range(db, start_date, end_date)
+    stmt = PaymentService.export_query(
+        start_date, end_date, client_id, PaymentMethodModel(method.value) if method else None
+    )
+    return await export_response(db, stmt, format, "payments")
 
 @router.get("/{payment_id}", response_model=PaymentResponse)
-def get_payment(
+async def get_payment(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    payment = PaymentService.get_payment_by_id(db, payment_id)
+    payment = await PaymentService.get_payment_by_id(db, payment_id)
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
     return payment
 
 @router.put("/{payment_id}", response_model=PaymentResponse)
-def update_payment(
+async def update_payment(
     payment_id: int,
     payment_data: PaymentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return PaymentService.update_payment(db, payment_id, payment_data, current_user)
+    return await PaymentService.update_payment(db, payment_id, payment_data, current_user)
 
 @router.delete("/{payment_id}")
-def delete_payment(
+async def delete_payment(
     payment_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return PaymentService.delete_payment(db, payment_id, current_user)
\ No newline at end of file
+    return await PaymentService.delete_payment(db, payment_id, current_user)
\ No newline at end of file
@@ -1,108 +1,184 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_primary_db, get_read_db
+from app.core.http_cache import conditional_get
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.core.response_cache import cached
+from app.core.responses import ListSerializer
 from app.core.security import get_current_user
 from app.models.auth import User
 from app.schemas.services import (
     ServiceCreate, ServiceResponse, ServiceUpdate, ServiceActiveUpdate,
     ServiceAssignmentCreate, ServiceAssignmentResponse, ServiceAssignmentUpdate,
-    InvoicePreviewRequest, InvoicePreviewResponse
+    ServiceAssignmentBulkCreate, ServiceAssignmentBulkStatusUpdate,
+    InvoicePreviewRequest, InvoicePreviewResponse,
+    BillingRunRequest, BillingRunClientPreview
 )
+from app.services.service_catalog import service_catalog
 from app.services.services import ServiceService, ServiceAssignmentService
+from app.utils.export import ExportFormat, export_response
+from app.utils.streaming import ndjson_items, ndjson_response
 
 router = APIRouter(prefix="/services", tags=["services"])
 
+assignment_list = ListSerializer(ServiceAssignmentResponse)
+
 # Service Assignment Endpoints (PUT THESE FIRST - STATIC PATHS)
-@router.get("/assignments", response_model=List[ServiceAssignmentResponse])
-def get_service_assignments(
+@router.get(
+    "/assignments", response_model=List[ServiceAssignmentResponse],
+    dependencies=[Depends(conditional_get("service_assignments"))]
+)
+async def get_service_assignments(
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header; overrides skip"),
+    db: AsyncSession = Depends(get_primary_db),
+    current_user: User = Depends(get_current_user)
+):
+    page = await ServiceAssignmentService.get_service_assignments(db, skip, limit, cursor)
+    headers = {NEXT_CURSOR_HEADER: page.next_cursor} if page.next_cursor else None
+    return assignment_list.response(page.items, headers)
+
+@router.get("/assignments/export")
+async def export_service_assignments(
+    format: ExportFormat = "csv",
+    client_id: Optional[int] = None,
+    service_id: Optional[int] = None,
+    status: Optional[bool] = None,
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceAssignmentService.get_service_assignments(db, skip, limit)
+    stmt = ServiceAssignmentService.export_query(client_id, service_id, status)
+    return await export_response(db, stmt, format, "service_assignments")
 
 @router.post("/assignments", response_model=ServiceAssignmentResponse)
-def create_service_assignment(
+async def create_service_assignment(
     assignment_data: ServiceAssignmentCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceAssignmentService.create_service_assignment(db, assignment_data, current_user)
+    return await ServiceAssignmentService.create_service_assignment(db, assignment_data, current_user)
+
+@router.post("/assignments/bulk", response_model=List[ServiceAssignmentResponse])
+async def create_service_assignments(
+    bulk_data: ServiceAssignmentBulkCreate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await ServiceAssignmentService.create_service_assignments(db, bulk_data.assignments, current_user)
+
+@router.patch("/assignments/status", response_model=List[ServiceAssignmentResponse])
+async def update_service_assignments_status(
+    status_data: ServiceAssignmentBulkStatusUpdate,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(get_current_user)
+):
+    return await ServiceAssignmentService.update_service_assignments_status(db, status_data, current_user)
 
 @router.patch("/assignments/{assignment_id}/status", response_model=ServiceAssignmentResponse)
-def update_service_assignment_status(
+async def update_service_assignment_status(
     assignment_id: int,
     status_data: ServiceAssignmentUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceAssignmentService.update_service_assignment_status(db, assignment_id, status_data.status, current_user)
+    return await ServiceAssignmentService.update_service_assignment_status(db, assignment_id, status_data.status, current_user)
 
 # Service Endpoints (PUT THESE AFTER - DYNAMIC PATHS)
 @router.post("/", response_model=ServiceResponse)
-def create_service(
+async def create_service(
     service_data: ServiceCreate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceService.create_service(db, service_data, current_user)
+    return await ServiceService.create_service(db, service_data, current_user)
 
-@router.get("/", response_model=List[ServiceResponse])
-def get_services(
+# Served from the per-worker catalog, so validated against the version it was loaded at
+@router.get(
+    "/", response_model=List[ServiceResponse],
+    dependencies=[Depends(conditional_get("services", versions=service_catalog.versions))]
+)
+async def get_services(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
-    db: Session = Depends(get_db),
+    cursor: Optional[str] = Query(None, description=f"Opaque cursor from the {NEXT_CURSOR_HEADER} header; overrides skip"),
+    db: AsyncSession = Depends(get_primary_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceService.get_services(db, skip, limit)
+    page = await ServiceService.get_services(db, skip, limit, cursor)
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 @router.get("/{service_id}", response_model=ServiceResponse)
-def get_service(
+async def get_service(
     service_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    service = ServiceService.get_service_by_id(db, service_id)
+    service = await ServiceService.get_service_by_id(db, service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
     return service
 
 @router.put("/{service_id}", response_model=ServiceResponse)
-def update_service(
+async def update_service(
     service_id: int,
     service_data: ServiceUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceService.update_service(db, service_id, service_data, current_user)
+    return await ServiceService.update_service(db, service_id, service_data, current_user)
 
 @router.delete("/{service_id}")
-def delete_service(
+async def delete_service(
     service_id: int,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceService.delete_service(db, service_id, current_user)
+    return await ServiceService.delete_service(db, service_id, current_user)
 
 @router.patch("/{service_id}/active", response_model=ServiceResponse)
-def update_service_active(
+async def update_service_active(
     service_id: int,
     active_data: ServiceActiveUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceService.update_service_active(db, service_id, active_data.active, current_user)
+    return await ServiceService.update_service_active(db, service_id, active_data.active, current_user)
 
 
 @router.post("/assignments/preview", response_model=InvoicePreviewResponse)
-def get_invoice_preview(
+@cached(
+    "invoice_preview",
+    # Service names are part of the preview
+    tags=["assignments:client:{preview_data.client_id}", "services"],
+    key="{preview_data.client_id}:{preview_data.months}",
+    model=InvoicePreviewResponse,
+)
+async def get_invoice_preview(
     preview_data: InvoicePreviewRequest,
-    db: Session = Depends(get_db),
+    # Misses only: the cache, not a replica, takes the repeated previews
+    db: AsyncSession = Depends(get_primary_db),
     current_user: User = Depends(get_current_user)
 ):
-    return ServiceAssignmentService.get_invoice_preview_for_client(
+    return await ServiceAssignmentService.get_invoice_preview_for_client(
         db, preview_data.client_id, preview_data.months
-    )
\ No newline at end of file
+    )
+
+
+@router.post("/assignments/billing-run")
+async def run_billing(
+    run_data: BillingRunRequest,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: User = Depends(get_current_user)
+):
+    """
+    Prorated previews for all active clients (or the given client_ids) over
+    the given months, streamed as NDJSON: one BillingRunClientPreview per line.
+    """
+    previews = ServiceAssignmentService.billing_run(db, run_data.months, run_data.client_ids)
+    return ndjson_response(ndjson_items(previews, BillingRunClientPreview))
@@ -1,7 +1,11 @@
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from .settings import settings
+from .db_pool import pool_options, instrument_pool, TimedQueuePool, TimedAsyncQueuePool
+# Sessions that bump per-table change counters after commit (HTTP caching)
+from .table_versions import VersionedAsyncSession, VersionedSession
 
 # -------------------------
 # Database URL
@@ -13,14 +17,58 @@ DATABASE_URL = (
     f"{settings.DB_NAME}"
 )
 
+ASYNC_DATABASE_URL = (
+    f"postgresql+asyncpg://"
+    f"{settings.DB_USER}:{settings.DB_PASSWORD}@"
+    f"{settings.DB_HOST}:{settings.DB_PORT}/"
+    f"{settings.DB_NAME}"
+)
+
 # -------------------------
-# SQLAlchemy Engine & Session
+# SQLAlchemy Engine & Session (sync: alembic, scripts)
 # -------------------------
+# Not a fallback for the API: the services and routers are async-only, so
+# there is no setting that serves requests through this engine.
 engine = create_engine(
     DATABASE_URL,
-    pool_pre_ping=True,  # avoid "server closed connection" errors
+    poolclass=TimedQueuePool,
+    **pool_options(),  # pre-ping avoids "server closed connection" errors
+)
+instrument_pool(engine, "sync")
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine, class_=VersionedSession)
+
+# -------------------------
+# Async Engine & Session (API requests)
+# -------------------------
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    poolclass=TimedAsyncQueuePool,
+    **pool_options(),
+)
+instrument_pool(async_engine.sync_engine, "primary")
+
+# -------------------------
+# Read replicas (optional)
+# -------------------------
+REPLICA_DATABASE_URLS = [url.strip() for url in settings.DB_REPLICA_URLS.split(",") if url.strip()]
+
+replica_engines = [
+    create_async_engine(url, poolclass=TimedAsyncQueuePool, **pool_options())
+    for url in REPLICA_DATABASE_URLS
+]
+for index, replica_engine in enumerate(replica_engines):
+    instrument_pool(replica_engine.sync_engine, f"replica{index}")
+
+ReplicaSessionLocals = [
+    async_sessionmaker(bind=replica_engine, autoflush=False, expire_on_commit=False, class_=VersionedAsyncSession)
+    for replica_engine in replica_engines
+]
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=VersionedAsyncSession,
+    autoflush=False,
+    expire_on_commit=False,  # objects stay readable after commit without lazy IO
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 # -------------------------
 # Base class for models
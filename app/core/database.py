@@ -1,9 +1,68 @@
-from app.core.config import SessionLocal
+import random
+from typing import Optional
+
+import redis
+from fastapi import Request
+from jose import JWTError, jwt
+
+from app.core.config import SessionLocal, AsyncSessionLocal, ReplicaSessionLocals
+from app.core.redis_client import async_redis_client
+from app.core.settings import settings
+
+READ_ONLY_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+def _sticky_key(request: Request) -> Optional[str]:
+    """Redis key marking that the caller wrote recently, or None for anonymous requests."""
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        # Only used for routing; the endpoint still verifies the token
+        subject = jwt.get_unverified_claims(token).get("sub")
+    except JWTError:
+        return None
+    return f"db:recent-write:{subject}" if subject else None
+
+async def _session_factory(request: Request, read_only: bool):
+    """Primary for writes and for readers that just wrote; a replica otherwise."""
+    if not ReplicaSessionLocals:
+        return AsyncSessionLocal  # nothing to route, and no stickiness to record
+    key = _sticky_key(request)
+    try:
+        if not read_only:
+            if key:
+                await async_redis_client.set(key, 1, ex=settings.DB_READ_YOUR_WRITES_SECONDS)
+            return AsyncSessionLocal
+        if key and await async_redis_client.exists(key):
+            return AsyncSessionLocal
+    except redis.RedisError:
+        return AsyncSessionLocal  # can't tell, so stay consistent
+    return random.choice(ReplicaSessionLocals)
 
 # Dependency to get DB session
-def get_db():
+async def get_db(request: Request):
+    session_factory = await _session_factory(request, request.method in READ_ONLY_METHODS)
+    async with session_factory() as db:
+        yield db
+
+# For responses validated with conditional_get() or stored by cached():
+# versions and cache tags are bumped after commits on the primary, so a
+# lagging replica could pair an old body with the new version, to be served
+# until the next write (or cache expiry)
+async def get_primary_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+# For read-only endpoints that use POST (e.g. previews)
+async def get_read_db(request: Request):
+    session_factory = await _session_factory(request, read_only=True)
+    async with session_factory() as db:
+        yield db
+
+# Blocking session for scripts and anything that cannot await
+def get_sync_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
@@ -0,0 +1,87 @@
+import time
+from typing import Dict
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .metrics import metrics
+from .settings import settings
+
+# name -> engine, for the admin view (engine.pool changes after dispose())
+_engines: Dict[str, Engine] = {}
+
+
+def pool_options() -> dict:
+    """create_engine keyword arguments for the pool, from Settings."""
+    return {
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+class _TimedCheckoutMixin:
+    """Records how long callers wait to get a connection out of the pool."""
+
+    metrics_name = "default"
+
+    def connect(self):
+        started_at = time.perf_counter()
+        try:
+            return super().connect()
+        except Exception:
+            metrics.counter(f"db_pool_{self.metrics_name}_checkout_errors_total").inc()
+            raise
+        finally:
+            metrics.histogram(
+                f"db_pool_{self.metrics_name}_checkout_wait_seconds",
+                "Time spent waiting for a pooled connection",
+            ).observe(time.perf_counter() - started_at)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics_name = self.metrics_name
+        return pool
+
+
+class TimedQueuePool(_TimedCheckoutMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedCheckoutMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_pool(engine: Engine, name: str):
+    """Name the engine's pool, count its events and register it for pool_status()."""
+    engine.pool.metrics_name = name
+    _engines[name] = engine
+
+    connects = metrics.counter(f"db_pool_{name}_connects_total", "New DBAPI connections opened")
+    checkouts = metrics.counter(f"db_pool_{name}_checkouts_total", "Connections handed out")
+    invalidations = metrics.counter(f"db_pool_{name}_invalidations_total", "Connections discarded as broken")
+
+    event.listen(engine, "connect", lambda *args: connects.inc())
+    event.listen(engine, "checkout", lambda *args: checkouts.inc())
+    event.listen(engine, "invalidate", lambda *args: invalidations.inc())
+
+
+def pool_status() -> dict:
+    """Live checkout/idle/overflow counts plus the checkout wait histogram per pool."""
+    status = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        status[name] = {
+            "pool_size": pool.size(),
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "checked_out": pool.checkedout(),
+            "idle": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "checkout_wait_seconds": metrics.histogram(
+                f"db_pool_{name}_checkout_wait_seconds"
+            ).snapshot(),
+        }
+    return status
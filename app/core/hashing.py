@@ -0,0 +1,63 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from fastapi import HTTPException, status
+
+from .metrics import metrics
+from .settings import settings
+
+# -------------------------
+# Dedicated executor for bcrypt
+# -------------------------
+# bcrypt is deliberately slow (100-300 ms); running it on the event loop
+# stalls every other request on the worker, and running it on the default
+# threadpool competes with sync endpoints. It gets its own bounded pool.
+_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+_pending = 0
+_pending_lock = Lock()
+
+queue_depth = metrics.gauge("password_hash_queue_depth", "Hash jobs queued or running")
+rejected_total = metrics.counter("password_hash_rejected_total", "Hash jobs refused because the queue was full")
+wait_seconds = metrics.histogram("password_hash_wait_seconds", "Time a hash job waited for a worker")
+run_seconds = metrics.histogram("password_hash_run_seconds", "Time spent hashing/verifying")
+
+
+def _timed(fn, submitted_at: float, *args):
+    started_at = time.perf_counter()
+    wait_seconds.observe(started_at - submitted_at)
+    try:
+        return fn(*args)
+    finally:
+        run_seconds.observe(time.perf_counter() - started_at)
+
+
+async def run_hashing(fn, *args):
+    """Run a password hash/verify call on the hashing pool without blocking the loop."""
+    global _pending
+    with _pending_lock:
+        if _pending >= settings.PASSWORD_HASH_MAX_QUEUE:
+            rejected_total.inc()
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Authentication is busy, please retry",
+                headers={"Retry-After": "1"},
+            )
+        _pending += 1
+        queue_depth.inc()
+
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_executor, _timed, fn, time.perf_counter(), *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+            queue_depth.dec()
+
+
+def shutdown():
+    _executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,87 @@
+import hashlib
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import redis
+from fastapi import Depends, Request, Response
+
+from app.core.security import get_current_user
+from app.core.table_versions import TableVersion, get_versions
+
+# Browsers keep the body but must revalidate with If-None-Match every time
+CACHE_CONTROL = "private, no-cache"
+
+
+class NotModified(Exception):
+    def __init__(self, etag: str):
+        self.etag = etag
+
+
+async def not_modified_handler(request: Request, exc: NotModified) -> Response:
+    return Response(status_code=304, headers={"ETag": exc.etag, "Cache-Control": CACHE_CONTROL})
+
+
+def _matches(if_none_match: str, etag: str) -> bool:
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    # Weak comparison: W/"x" and "x" are the same validator
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+
+def conditional_get(
+    *tables: str,
+    versions: Callable[[List[str]], Awaitable[Optional[Dict[str, TableVersion]]]] = get_versions
+) -> Callable:
+    """
+    Dependency answering If-None-Match with 304 before the endpoint runs.
+
+    The weak ETag covers the versions of `tables` (see table_versions)
+    plus the path and query string, so it changes whenever any of those
+    tables is written, and when Redis loses the versions. ETagMiddleware
+    adds it to the full response otherwise.
+
+    Endpoints serving a per-worker copy instead of querying pass that
+    copy's `versions`, the ones its data was loaded at (None for no ETag):
+    the current versions can be ahead of a copy that has yet to hear of a
+    change, and would label its old data with the new ETag.
+    """
+    async def dependency(request: Request, current_user=Depends(get_current_user)):
+        try:
+            table_versions = await versions(list(tables))
+        except redis.RedisError:
+            return  # no validator: serve the full response
+        if table_versions is None:
+            return
+        digest = hashlib.blake2b(digest_size=8)
+        digest.update(f"{request.url.path}?{request.url.query}".encode())
+        for table in tables:
+            digest.update(f"|{table}:{table_versions[table]}".encode())
+        etag = f'W/"{digest.hexdigest()}"'
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match and _matches(if_none_match, etag):
+            raise NotModified(etag)
+        request.state.etag = etag
+
+    return dependency
+
+
+class ETagMiddleware:
+    """Adds the ETag computed by conditional_get() to successful responses."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        async def send_with_etag(message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                etag = scope.get("state", {}).get("etag")
+                if etag:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"etag", etag.encode()))
+                    headers.append((b"cache-control", CACHE_CONTROL.encode()))
+                    message["headers"] = headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
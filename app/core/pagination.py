@@ -0,0 +1,83 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Any, List, NamedTuple, Optional, Sequence
+
+from fastapi import HTTPException
+from sqlalchemy import Select, tuple_
+
+# Response header carrying the cursor for the next page
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class Page(NamedTuple):
+    items: List[Any]
+    next_cursor: Optional[str]
+
+
+def _encode_value(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, "value"):  # enums
+        return value.value
+    return value
+
+
+def _decode_value(column, value):
+    python_type = column.type.python_type
+    if value is None:
+        return None
+    if python_type is datetime:
+        return datetime.fromisoformat(value)
+    if python_type is date:
+        return date.fromisoformat(value)
+    return python_type(value)
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, columns: Sequence) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(values, list) or len(values) != len(columns):
+            raise ValueError("cursor does not match this listing")
+        return [_decode_value(column, value) for column, value in zip(columns, values)]
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid cursor: {str(e)}")
+
+
+def keyset_paginate(
+    stmt: Select,
+    columns: Sequence,
+    cursor: Optional[str],
+    skip: int,
+    limit: int,
+    descending: bool = False,
+) -> Select:
+    """
+    Order `stmt` by `columns` (sort key(s) then a unique id) and fetch one page.
+
+    With a cursor the page starts right after the row the cursor was taken
+    from, which stays fast and stable on deep pages; without one the legacy
+    offset is applied.
+    """
+    stmt = stmt.order_by(*[c.desc() if descending else c.asc() for c in columns])
+    if cursor:
+        key, last_seen = tuple_(*columns), tuple_(*decode_cursor(cursor, columns))
+        stmt = stmt.where(key < last_seen if descending else key > last_seen)
+    elif skip:
+        stmt = stmt.offset(skip)
+    return stmt.limit(limit)
+
+
+def make_page(items: Sequence[Any], limit: int, attributes: Sequence[str]) -> Page:
+    """Wrap a fetched page; next_cursor is None once a short page shows the end."""
+    items = list(items)
+    if not items or len(items) < limit:
+        return Page(items, None)
+    last = items[-1]
+    return Page(items, encode_cursor([getattr(last, name) for name in attributes]))
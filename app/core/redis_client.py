@@ -1,13 +1,51 @@
 import redis
+import redis.asyncio
+from typing import Callable, Dict, List
 from .settings import settings
 from datetime import timedelta
 
 redis_client = redis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+# Same server, for coroutines that must not block the event loop
+async_redis_client = redis.asyncio.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+# Pub/sub channel used to tell every worker that a token was revoked
+REVOKED_TOKENS_CHANNEL = "auth:revoked-tokens"
+
+# channel -> handlers, registered at import time and attached by start_listener()
+_subscribers: Dict[str, List[Callable[[str], None]]] = {}
+_listener_thread = None
 
 #for storiong revoked token
 def store_revoked_token(jti: str, ttl: timedelta):
     redis_client.setex(name=jti, time=int(ttl.total_seconds()), value="revoked")
+    redis_client.publish(REVOKED_TOKENS_CHANNEL, jti)
 
 #check revoked token
 def is_token_revoked(jti: str) -> bool:
-    return redis_client.exists(jti) == 1
\ No newline at end of file
+    return redis_client.exists(jti) == 1
+
+# -------------------------
+# Cross-worker invalidation (pub/sub)
+# -------------------------
+def subscribe(channel: str, handler: Callable[[str], None]):
+    """Register a handler called with the message payload for every publish on channel."""
+    _subscribers.setdefault(channel, []).append(handler)
+
+def _dispatch(message: dict):
+    for handler in _subscribers.get(message["channel"], []):
+        handler(message["data"])
+
+def start_listener():
+    """Start the background pub/sub thread; called once per worker on startup."""
+    global _listener_thread
+    if _listener_thread is not None or not _subscribers:
+        return
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(**{channel: _dispatch for channel in _subscribers})
+    _listener_thread = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+
+def stop_listener():
+    global _listener_thread
+    if _listener_thread is not None:
+        _listener_thread.stop()
+        _listener_thread = None
@@ -0,0 +1,129 @@
+import functools
+import hashlib
+import time
+from typing import Any, Callable, Optional, Sequence
+
+import redis
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.core.metrics import metrics
+from app.core.redis_client import async_redis_client, redis_client
+from app.core.settings import settings
+
+TAG_PREFIX = "cache-tag:"
+ENTRY_PREFIX = "response-cache:"
+
+_invalidation_errors = metrics.counter(
+    "response_cache_invalidation_errors_total", "Tag invalidations lost to Redis errors (entries age out by TTL)"
+)
+
+
+def _tag_keys(tags: Sequence[str]) -> list:
+    return [TAG_PREFIX + tag for tag in tags]
+
+
+async def invalidate(*tags: str):
+    """
+    Call after committing a write: every cached response carrying one of
+    `tags` is skipped from now on (the tag's version moves on, so the old
+    entries are simply never read again and expire on their own).
+    """
+    if not tags:
+        return
+    try:
+        async with async_redis_client.pipeline(transaction=False) as pipe:
+            for key in _tag_keys(tags):
+                pipe.incr(key)
+            await pipe.execute()
+    except redis.RedisError as e:
+        _invalidation_errors.inc()
+        print(f"Response cache invalidation failed for {', '.join(tags)}: {e}")
+
+
+def invalidate_sync(*tags: str):
+    """invalidate() for scripts and other synchronous callers."""
+    if not tags:
+        return
+    try:
+        with redis_client.pipeline(transaction=False) as pipe:
+            for key in _tag_keys(tags):
+                pipe.incr(key)
+            pipe.execute()
+    except redis.RedisError as e:
+        _invalidation_errors.inc()
+        print(f"Response cache invalidation failed for {', '.join(tags)}: {e}")
+
+
+def cached(
+    name: str,
+    tags: Sequence[str],
+    key: str = "",
+    model: Any = None,
+    ttl: Optional[int] = None,
+) -> Callable:
+    """
+    Cache a GET-like endpoint's JSON response in Redis.
+
+    `key` and `tags` are str.format() templates over the endpoint's
+    arguments, e.g. key="{client_id}", tags=["payments", "client:{client_id}"];
+    attribute access works for request bodies ("{preview_data.client_id}").
+    The entry key includes the current version of every tag, so
+    invalidate() on any of them makes the entry unreachable.
+
+    The endpoint's result is serialized with a TypeAdapter for `model`
+    (or taken as is when it already is a Response) and the cached bytes
+    are returned as a Response, so `model` should match the route's
+    response_model. Errors are not cached; when Redis is unavailable the
+    endpoint simply runs.
+
+    Metrics: response_cache_<name>_hits_total / _misses_total and
+    response_cache_<name>_saved_seconds, the compute time each hit avoided.
+    """
+    adapter = TypeAdapter(model) if model is not None else None
+    ttl = ttl or settings.RESPONSE_CACHE_TTL_SECONDS
+    hits = metrics.counter(f"response_cache_{name}_hits_total", f"{name} responses served from the cache")
+    misses = metrics.counter(f"response_cache_{name}_misses_total", f"{name} responses computed")
+    saved = metrics.histogram(f"response_cache_{name}_saved_seconds", f"Compute time saved per {name} cache hit")
+
+    def decorator(endpoint: Callable) -> Callable:
+        @functools.wraps(endpoint)
+        async def wrapper(*args, **kwargs):
+            entry_key = None
+            try:
+                tag_names = [tag.format(**kwargs) for tag in tags]
+                versions = await async_redis_client.mget(_tag_keys(tag_names)) if tag_names else []
+                digest = hashlib.blake2b(key.format(**kwargs).encode(), digest_size=12).hexdigest()
+                entry_key = f"{ENTRY_PREFIX}{name}:{digest}:" + ".".join(v or "0" for v in versions)
+                entry = await async_redis_client.get(entry_key)
+            except redis.RedisError as e:
+                print(f"Response cache lookup failed for {name}: {e}")
+                entry = None
+
+            if entry is not None:
+                seconds, body = entry.split("\n", 1)
+                hits.inc()
+                saved.observe(float(seconds))
+                return Response(content=body, media_type="application/json")
+
+            misses.inc()
+            started = time.perf_counter()
+            result = await endpoint(*args, **kwargs)
+            if isinstance(result, Response):
+                if result.status_code != 200:
+                    return result
+                body = result.body
+            else:
+                body = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            elapsed = time.perf_counter() - started
+
+            if entry_key is not None:
+                try:
+                    await async_redis_client.set(entry_key, f"{elapsed:.6f}\n{body.decode()}", ex=ttl)
+                except redis.RedisError as e:
+                    print(f"Response cache store failed for {name}: {e}")
+            return Response(content=body, media_type="application/json")
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,31 @@
+from typing import Any, Iterable, List, Mapping, Optional, Type
+
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+
+
+def response_columns(entity, model: Type[BaseModel]) -> list:
+    """The entity's columns named like `model`'s fields, for selecting rows instead of objects."""
+    return [getattr(entity, name) for name in model.model_fields]
+
+
+class ListSerializer:
+    """
+    Fast path for large list responses.
+
+    The TypeAdapter for List[model] is built once, at import time, instead
+    of per request. Rows, which can be plain SQLAlchemy Rows rather than ORM
+    objects, are validated and encoded to JSON bytes in one pydantic-core
+    pass. The bytes match what `response_model=List[model]` would produce.
+    Keep response_model on the route for the OpenAPI schema; returning a
+    Response bypasses FastAPI's own validation.
+    """
+
+    def __init__(self, model: Type[BaseModel]):
+        self.adapter = TypeAdapter(List[model])
+
+    def dump_json(self, rows: Iterable[Any]) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(list(rows), from_attributes=True))
+
+    def response(self, rows: Iterable[Any], headers: Optional[Mapping[str, str]] = None) -> Response:
+        return Response(self.dump_json(rows), media_type="application/json", headers=headers)
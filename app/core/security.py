@@ -9,7 +9,11 @@ from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 
 from .settings import settings
-from .redis_client import store_revoked_token, is_token_revoked
+from .redis_client import (
+    store_revoked_token, is_token_revoked, subscribe, REVOKED_TOKENS_CHANNEL
+)
+from .token_cache import TokenCache
+from .hashing import run_hashing
 
 # Environment variables
 SECRET_KEY = settings.SECRET_KEY
@@ -19,6 +23,13 @@ REFRESH_TOKEN_EXPIRE_MINUTES = settings.REFRESH_TOKEN_EXPIRE_MINUTES
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
+# Verified-token cache, evicted on every worker when a token is revoked
+token_cache = TokenCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
+subscribe(REVOKED_TOKENS_CHANNEL, token_cache.evict)
+
 # Password hashing
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -31,6 +42,13 @@ def hash_password(password: str) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
 
+# Non-blocking variants for async code paths (run on the hashing pool)
+async def hash_password_async(password: str) -> str:
+    return await run_hashing(hash_password, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    return await run_hashing(verify_password, plain_password, hashed_password)
+
 def create_token(data: dict, expires_delta: timedelta) -> tuple[str, str, datetime]:
     to_encode = data.copy()
     jti = str(uuid.uuid4())
@@ -46,9 +64,14 @@ def create_refresh_token(data: dict) -> tuple[str, str, datetime]:
     return create_token(data, timedelta(minutes=REFRESH_TOKEN_EXPIRE_MINUTES))
 
 def revoke_token(jti: str, expires_in: int):
+    token_cache.evict(jti)
     store_revoked_token(jti, timedelta(minutes=expires_in))
 
 def verify_token(token: str, credentials_exception) -> TokenData:
+    cached = token_cache.get(token)
+    if cached is not None:
+        return cached
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username = payload.get("sub")
@@ -57,7 +80,9 @@ def verify_token(token: str, credentials_exception) -> TokenData:
         if not username or not jti or is_token_revoked(jti):
             raise credentials_exception
 
-        return TokenData(username=username)
+        token_data = TokenData(username=username)
+        token_cache.put(jti, token, token_data, payload.get("exp"))
+        return token_data
     except JWTError:
         raise credentials_exception
 
@@ -7,6 +7,41 @@ class Settings(BaseSettings):
     DB_PORT: int
     DB_NAME: str
 
+    # Connection pool (per engine, per worker)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: int = 30       # seconds to wait for a connection
+    DB_POOL_RECYCLE: int = 1800     # seconds; -1 disables
+    DB_POOL_PRE_PING: bool = True
+
+    # Optional read replicas: comma-separated SQLAlchemy async URLs
+    # e.g. "postgresql+asyncpg://user:pw@replica1:5432/db,postgresql+asyncpg://..."
+    DB_REPLICA_URLS: str = ""
+    # After a write, that user's reads go to the primary for this long
+    DB_READ_YOUR_WRITES_SECONDS: int = 5
+    # Months ahead kept partitioned once payments is partitioned (opt-in migration)
+    PAYMENT_PARTITIONS_AHEAD: int = 3
+    # Upper bound on rows per POST /payments/import
+    PAYMENT_IMPORT_MAX_ROWS: int = 100000
+    # Invoice PDF uploads: size limit, and how much is read/written at a time
+    UPLOAD_MAX_BYTES: int = 25 * 1024 * 1024
+    UPLOAD_CHUNK_SIZE: int = 1024 * 1024
+    # Invoice PDF storage: "local" (under INVOICE_STORE_DIR) or "s3". Switching a
+    # deployment with stored files to s3: run migrate_invoice_files --copy-local-store
+    INVOICE_STORAGE_BACKEND: str = "local"
+    INVOICE_STORE_DIR: str = "uploads/invoices"
+    # Local: let nginx send downloads from this internal location (X-Accel-Redirect)
+    INVOICE_ACCEL_REDIRECT_PREFIX: str = ""
+    # S3 or an S3-compatible server (endpoint URL for MinIO); empty keys use boto3's default chain
+    INVOICE_S3_BUCKET: str = "invoices"
+    INVOICE_S3_PREFIX: str = ""
+    INVOICE_S3_ENDPOINT_URL: str = ""
+    INVOICE_S3_REGION: str = ""
+    INVOICE_S3_ACCESS_KEY_ID: str = ""
+    INVOICE_S3_SECRET_ACCESS_KEY: str = ""
+    # Lifetime of the presigned download URLs (S3)
+    INVOICE_DOWNLOAD_URL_SECONDS: int = 300
+
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int
@@ -14,6 +49,32 @@ class Settings(BaseSettings):
 
     REDIS_URL: str
 
+    # Responses at least this large (bytes) are gzip-compressed
+    GZIP_MINIMUM_SIZE: int = 1024
+
+    # In-process cache of verified tokens (per worker)
+    TOKEN_CACHE_MAXSIZE: int = 10000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+
+    # In-process service catalog (per worker); pub/sub invalidates it sooner
+    SERVICE_CATALOG_TTL_SECONDS: int = 300
+
+    # Redis response cache; tag invalidation expires entries sooner
+    RESPONSE_CACHE_TTL_SECONDS: int = 300
+
+    # Table change counters behind HTTP ETags are bumped after each commit;
+    # a bump slower than this is dropped instead of delaying the response
+    TABLE_VERSION_BUMP_TIMEOUT_SECONDS: float = 0.5
+
+    # Identical concurrent aggregations share one computation per worker;
+    # with CROSS_WORKER a Redis lock extends that across workers
+    SINGLE_FLIGHT_CROSS_WORKER: bool = False
+    SINGLE_FLIGHT_LOCK_SECONDS: int = 30
+
+    # bcrypt executor (per worker)
+    PASSWORD_HASH_WORKERS: int = 2
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
     class Config:
         env_file = ".env"           # optional, since Docker already injects
         env_file_encoding = "utf-8"
@@ -0,0 +1,149 @@
+import asyncio
+import functools
+import inspect
+import time
+import uuid
+from typing import Any, Callable, Dict, Optional
+
+import redis
+from pydantic import TypeAdapter
+
+from app.core.metrics import metrics
+from app.core.redis_client import async_redis_client
+from app.core.settings import settings
+
+LOCK_PREFIX = "single-flight:"
+RESULT_PREFIX = "single-flight-result:"
+
+# How often a worker waiting on another worker's flight checks for its result
+_POLL_SECONDS = 0.05
+
+
+class _Flight:
+    """Counters and in-flight computations for one single_flight() function."""
+
+    def __init__(self, name: str):
+        self.in_flight: Dict[str, asyncio.Future] = {}
+        self.calls = metrics.counter(f"single_flight_{name}_calls_total", f"Calls to {name}")
+        self.coalesced = metrics.counter(
+            f"single_flight_{name}_coalesced_total", f"{name} calls that shared a computation in this worker"
+        )
+        self.remote_coalesced = metrics.counter(
+            f"single_flight_{name}_remote_coalesced_total", f"{name} calls that shared another worker's computation"
+        )
+
+
+def single_flight(name: str, key: str = "", model: Any = None, cross_worker: Optional[bool] = None) -> Callable:
+    """
+    Let concurrent identical calls to an async function share one computation.
+
+    `key` is a str.format() template over the function's arguments (the
+    database session is never part of it), e.g. "{client_id}:{months}".
+    While a call for a key is running in this worker, further calls for
+    the same key wait for it and get its result, or its exception.
+
+    With cross_worker (default SINGLE_FLIGHT_CROSS_WORKER) the first caller
+    across all workers also takes a short Redis lock; callers in other
+    workers wait for the result it publishes, serialized with a TypeAdapter
+    for `model`, and return it as plain Python data. If that worker fails
+    or the wait exceeds SINGLE_FLIGHT_LOCK_SECONDS they compute it
+    themselves, as they do whenever Redis is unavailable.
+
+    Only results are shared, never cached: a call that starts after the
+    computation finished runs its own.
+    """
+    flight = _Flight(name)
+    adapter = TypeAdapter(model) if model is not None else None
+
+    def decorator(fn: Callable) -> Callable:
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        async def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            flight_key = key.format(**bound.arguments)
+            flight.calls.inc()
+
+            future = flight.in_flight.get(flight_key)
+            if future is not None:
+                flight.coalesced.inc()
+                try:
+                    return await asyncio.shield(future)
+                except asyncio.CancelledError:
+                    if not future.cancelled():
+                        raise  # this caller was cancelled
+                    # The leading call was cancelled; compute it here instead
+
+            future = asyncio.get_running_loop().create_future()
+            flight.in_flight[flight_key] = future
+            try:
+                use_redis = settings.SINGLE_FLIGHT_CROSS_WORKER if cross_worker is None else cross_worker
+                if use_redis and adapter is not None:
+                    result = await _across_workers(flight, name, flight_key, adapter, lambda: fn(*args, **kwargs))
+                else:
+                    result = await fn(*args, **kwargs)
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # retrieved: no "never retrieved" warning without waiters
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                if not future.done():
+                    future.cancel()  # cancelled: waiters compute it themselves
+                flight.in_flight.pop(flight_key, None)
+
+        return wrapper
+
+    return decorator
+
+
+async def _across_workers(flight: _Flight, name: str, flight_key: str, adapter: TypeAdapter, compute: Callable):
+    lock_key = f"{LOCK_PREFIX}{name}:{flight_key}"
+    ttl = settings.SINGLE_FLIGHT_LOCK_SECONDS
+    token = uuid.uuid4().hex
+    try:
+        acquired = await async_redis_client.set(lock_key, token, nx=True, ex=ttl)
+        leader = None if acquired else await async_redis_client.get(lock_key)
+    except redis.RedisError as e:
+        print(f"Single-flight lock failed for {name}: {e}")
+        return await compute()
+
+    if leader is not None:
+        # Another worker is computing it: wait for the result it publishes
+        deadline = time.monotonic() + ttl
+        try:
+            while time.monotonic() < deadline:
+                # Lock first: the result is published before the lock is released
+                holder = await async_redis_client.get(lock_key)
+                raw = await async_redis_client.get(f"{RESULT_PREFIX}{leader}")
+                if raw is not None:
+                    flight.remote_coalesced.inc()
+                    return adapter.dump_python(adapter.validate_json(raw))
+                if holder != leader:
+                    break  # it gave up without a result
+                await asyncio.sleep(_POLL_SECONDS)
+        except redis.RedisError as e:
+            print(f"Single-flight wait failed for {name}: {e}")
+        return await compute()
+
+    if not acquired:
+        return await compute()  # the lock expired between SET and GET
+
+    try:
+        result = await compute()
+        try:
+            payload = adapter.dump_json(adapter.validate_python(result, from_attributes=True))
+            await async_redis_client.set(f"{RESULT_PREFIX}{token}", payload.decode(), ex=ttl)
+        except redis.RedisError as e:
+            print(f"Single-flight publish failed for {name}: {e}")
+        return result
+    finally:
+        try:
+            # Only our own lock; a lock that already expired may belong to a newer flight
+            if await async_redis_client.get(lock_key) == token:
+                await async_redis_client.delete(lock_key)
+        except redis.RedisError:
+            pass  # expires on its own
@@ -0,0 +1,169 @@
+import asyncio
+import secrets
+from itertools import chain
+from typing import Dict, Iterable, List, NamedTuple
+
+import redis
+from sqlalchemy import event, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from .redis_client import async_redis_client, redis_client
+from .settings import settings
+
+# Per-table change counters shared by every worker, e.g. table-version:payments
+_KEY_PREFIX = "table-version:"
+# Random nonce per counter, e.g. table-version-epoch:payments. A Redis restart
+# (or flush) loses both, and the counter starts again from 0; the new epoch
+# keeps those versions from matching the ones handed out before
+_EPOCH_PREFIX = "table-version-epoch:"
+_SESSION_INFO_KEY = "changed_tables"
+# Written by committed transactions, waiting for the session to bump them
+_COMMITTED_INFO_KEY = "committed_tables"
+
+
+def _key(table: str) -> str:
+    return f"{_KEY_PREFIX}{table}"
+
+
+def _epoch_key(table: str) -> str:
+    return f"{_EPOCH_PREFIX}{table}"
+
+
+class TableVersion(NamedTuple):
+    epoch: str
+    counter: int
+
+    def __str__(self):
+        return f"{self.epoch}.{self.counter}"
+
+
+def mark_changed(session: Session, *tables: str):
+    """
+    Record writes the session events cannot see (COPY, raw SQL on the
+    driver connection); they are bumped with the rest on commit.
+    """
+    session.info.setdefault(_SESSION_INFO_KEY, set()).update(tables)
+
+
+def bump(tables: Iterable[str]):
+    pipe = redis_client.pipeline(transaction=False)
+    for table in sorted(tables):
+        pipe.incr(_key(table))
+    pipe.execute()
+
+
+async def bump_async(tables: Iterable[str]):
+    pipe = async_redis_client.pipeline(transaction=False)
+    for table in sorted(tables):
+        pipe.incr(_key(table))
+    await pipe.execute()
+
+
+async def get_versions(tables: List[str]) -> Dict[str, TableVersion]:
+    values = await async_redis_client.mget([_key(t) for t in tables] + [_epoch_key(t) for t in tables])
+    counters, epochs = values[:len(tables)], values[len(tables):]
+    missing = [table for table, epoch in zip(tables, epochs) if epoch is None]
+    if missing:
+        # First read since the keys were lost: start a new epoch, unless
+        # another worker got there first
+        pipe = async_redis_client.pipeline(transaction=False)
+        for table in missing:
+            pipe.set(_epoch_key(table), secrets.token_hex(8), nx=True)
+        for table in missing:
+            pipe.get(_epoch_key(table))
+        started = dict(zip(missing, (await pipe.execute())[len(missing):]))
+        epochs = [epoch if epoch is not None else started[table] for table, epoch in zip(tables, epochs)]
+    return {
+        table: TableVersion(epoch, int(counter or 0))
+        for table, counter, epoch in zip(tables, counters, epochs)
+    }
+
+
+# -------------------------
+# Session events (every Session, sync and async): collect the tables a
+# transaction wrote; they are handed over on commit and bumped by the
+# session classes below, outside the commit itself
+# -------------------------
+@event.listens_for(Session, "after_flush")
+def _record_flush(session, flush_context):
+    tables = {inspect(obj).mapper.persist_selectable.name for obj in chain(session.new, session.dirty, session.deleted)}
+    if tables:
+        mark_changed(session, *tables)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _record_dml(orm_execute_state):
+    # insert()/update()/delete() run through session.execute(), ORM-enabled or not
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        mark_changed(orm_execute_state.session, orm_execute_state.statement.table.name)
+
+
+@event.listens_for(Session, "after_commit")
+def _record_commit(session):
+    tables = session.info.pop(_SESSION_INFO_KEY, None)
+    if tables:
+        session.info.setdefault(_COMMITTED_INFO_KEY, set()).update(tables)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session):
+    session.info.pop(_SESSION_INFO_KEY, None)
+
+
+def _bump_failed(tables, e: Exception):
+    # The data is committed; caches keyed on these versions revalidate late
+    print(f"Table version bump failed for {sorted(tables)}: {e!r}")
+
+
+class VersionedSession(Session):
+    """Session (scripts) that bumps the versions of the tables it wrote after each commit."""
+
+    def _bump_committed(self):
+        tables = self.info.pop(_COMMITTED_INFO_KEY, None)
+        if not tables:
+            return
+        try:
+            bump(tables)
+        except redis.RedisError as e:
+            _bump_failed(tables, e)
+
+    def commit(self):
+        super().commit()
+        self._bump_committed()
+
+    def close(self):
+        # Commits made some other way (session.begin() blocks) are bumped here
+        try:
+            self._bump_committed()
+        finally:
+            super().close()
+
+
+class VersionedAsyncSession(AsyncSession):
+    """
+    AsyncSession (API requests) that bumps the versions of the tables it
+    wrote after each commit, awaiting Redis instead of blocking the event
+    loop. A bump that takes longer than TABLE_VERSION_BUMP_TIMEOUT_SECONDS
+    is abandoned rather than holding up the response.
+    """
+
+    async def _bump_committed(self):
+        tables = self.sync_session.info.pop(_COMMITTED_INFO_KEY, None)
+        if not tables:
+            return
+        try:
+            await asyncio.wait_for(bump_async(tables), settings.TABLE_VERSION_BUMP_TIMEOUT_SECONDS)
+        except (redis.RedisError, asyncio.TimeoutError) as e:
+            _bump_failed(tables, e)
+
+    async def commit(self):
+        await super().commit()
+        await self._bump_committed()
+
+    async def close(self):
+        # Commits made some other way (session.begin() blocks) are bumped here
+        try:
+            await self._bump_committed()
+        finally:
+            await super().close()
@@ -0,0 +1,79 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Optional
+
+from jose import JWTError, jwt
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of already-verified access tokens, keyed by jti.
+
+    An entry lives for at most `ttl` seconds and never past the token's own
+    `exp`. The raw token is stored alongside the result so a hit only counts
+    when the exact same signed token is presented again.
+
+    evict() also leaves a tombstone for the jti, so a verification that
+    passed the revocation check just before the token was revoked cannot
+    put it back afterwards.
+    """
+
+    def __init__(self, maxsize: int, ttl: int):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[str, tuple[str, Any, float]]" = OrderedDict()
+        # jti -> monotonic time the tombstone lapses; an entry could not outlive it anyway
+        self._revoked: "OrderedDict[str, float]" = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, token: str) -> Optional[Any]:
+        try:
+            jti = jwt.get_unverified_claims(token).get("jti")
+        except JWTError:
+            return None
+        if not jti:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(jti)
+            if entry is None:
+                return None
+            cached_token, value, expires_at = entry
+            if cached_token != token or expires_at <= time.monotonic():
+                del self._entries[jti]
+                return None
+            self._entries.move_to_end(jti)
+            return value
+
+    def put(self, jti: str, token: str, value: Any, exp: Optional[float]):
+        lifetime = self.ttl
+        if exp is not None:
+            lifetime = min(lifetime, exp - time.time())
+        if lifetime <= 0 or self.maxsize <= 0:
+            return
+
+        with self._lock:
+            if jti in self._revoked:
+                return
+            self._entries[jti] = (token, value, time.monotonic() + lifetime)
+            self._entries.move_to_end(jti)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def evict(self, jti: str):
+        now = time.monotonic()
+        with self._lock:
+            self._entries.pop(jti, None)
+            self._revoked[jti] = now + self.ttl
+            self._revoked.move_to_end(jti)
+            # Oldest first: drop lapsed tombstones, and cap memory like the entries
+            while self._revoked and (
+                next(iter(self._revoked.values())) <= now or len(self._revoked) > self.maxsize
+            ):
+                self._revoked.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._revoked.clear()
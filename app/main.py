@@ -1,22 +1,41 @@
 # app/main.py
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 from fastapi.openapi.utils import get_openapi
 
 from app.core.database import get_db
+from app.core.config import async_engine
+from app.core.settings import settings
+from app.core.redis_client import start_listener, stop_listener
+from app.core import hashing
+from app.core.http_cache import ETagMiddleware, NotModified, not_modified_handler
 from app.api.v1.endpoints import auth
 from app.api.v1.endpoints import clients
 from app.api.v1.endpoints import services
 from app.api.v1.endpoints import payments
 from app.api.v1.endpoints import invoice_router as invoice
+from app.api.v1.endpoints import admin
+from app.services.payment_partitions import PaymentPartitions
 
 # Lifespan context for startup/shutdown tasks
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     print("Running startup tasks...")
+    start_listener()  # cross-worker cache invalidation
+    try:
+        async with async_engine.begin() as conn:
+            created = await conn.run_sync(PaymentPartitions.ensure_future, settings.PAYMENT_PARTITIONS_AHEAD)
+        if created:
+            print(f"Created payment partitions: {', '.join(created)}")
+    except Exception as e:
+        # Not fatal: the default partition takes the rows until the next run
+        print(f"Payment partition check failed: {e}")
     yield
     print("Shutting down...")
+    stop_listener()
+    hashing.shutdown()
 
 app = FastAPI(
     lifespan=lifespan,
@@ -27,6 +46,11 @@ app = FastAPI(
     openapi_url="/api/openapi.json"
 )
 
+# Conditional GET (see app.core.http_cache) and compression of large bodies
+app.add_exception_handler(NotModified, not_modified_handler)
+app.add_middleware(ETagMiddleware)
+app.add_middleware(GZipMiddleware, minimum_size=settings.GZIP_MINIMUM_SIZE)
+
 # Correct CORS configuration for your setup
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +62,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],  # keyset pagination, conditional GET
 )
 
 # Custom OpenAPI with BearerAuth for JWT
@@ -68,6 +93,7 @@ app.include_router(clients.router, prefix="/api/v1", tags=["Clients"])
 app.include_router(services.router, prefix="/api/v1", tags=["Services"])
 app.include_router(payments.router, prefix="/api/v1", tags=["Payments"])
 app.include_router(invoice.router, prefix="/api/v1", tags=["Invoices"])
+app.include_router(admin.router, prefix="/api/v1", tags=["Admin"])
 
 # Root endpoint
 @app.get("/", tags=["Root"])
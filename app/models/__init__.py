@@ -2,4 +2,6 @@ from .base import Base
 
 # Import all models here to register them with Base metadata
 from .auth import *
-
+from .services import *
+from .invoice import *
+from .payments import *
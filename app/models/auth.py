@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, String, Integer, Enum, ForeignKey, Date, Text, DateTime, Boolean
+    Column, String, Integer, Enum, ForeignKey, Date, Text, DateTime, Boolean, Index, text
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -15,6 +15,10 @@ class UserRole(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # Client listing and the client lookups in the payment/billing services
+        Index("ix_users_clients_id", "id", postgresql_where=text("role = 'client'")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -1,17 +1,26 @@
-from sqlalchemy import Column, Integer, String, Date, ForeignKey
+from sqlalchemy import BigInteger, Column, Integer, String, Date, ForeignKey, Index
 from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
 from datetime import date
 from app.models.base import Base
 
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Invoice listing: newest first, optionally for one client
+        Index("ix_invoices_client_id_created_date_id", "client_id", "created_date", "id"),
+        Index("ix_invoices_created_date_id", "created_date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     invoice_number = Column(String, unique=True, index=True, nullable=False)
     client_id = Column(Integer, ForeignKey("users.id"), nullable=False)
     months = Column(String, nullable=False)  # e.g. "January 2025, February 2025"
-    created_date = Column(Date, default=date.today)
-    file_path = Column(String, nullable=True)  # e.g. "invoices/invoice_001.pdf"
+    # Part of the listing's keyset, so never NULL
+    created_date = Column(Date, nullable=False, default=date.today, server_default=func.current_date())
+    file_path = Column(String, nullable=True)  # e.g. "uploads/invoices/ab/cd/<sha256>.pdf"
+    file_sha256 = Column(String(64), nullable=True, index=True)  # content hash, names the file in the store
+    file_size = Column(BigInteger, nullable=True)  # bytes
 
     client = relationship("User", back_populates="invoices")
@@ -1,5 +1,5 @@
 from sqlalchemy import (
-    Column, String, Integer, Enum, ForeignKey, Date, Text, DateTime, Boolean, Float
+    Column, String, Integer, Enum, ForeignKey, Date, Text, DateTime, Boolean, Float, Index
 )
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -15,6 +15,12 @@ class PaymentMethod(str, enum.Enum):
 
 class Payment(Base):
     __tablename__ = "payments"
+    __table_args__ = (
+        # get_payments_by_client
+        Index("ix_payments_client_id_date", "client_id", "date"),
+        # get_payments (date, id) keyset and get_payments_by_date_range
+        Index("ix_payments_date_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     date = Column(Date, nullable=False, default=func.current_date())
@@ -34,4 +40,43 @@ class Payment(Base):
 
     # Relationships
     client = relationship("User", foreign_keys=[client_id], back_populates="payments")
-    received_by = relationship("User", foreign_keys=[received_by_id])
\ No newline at end of file
+    received_by = relationship("User", foreign_keys=[received_by_id])
+
+    # Used by PaymentResponse; load both relationships up front (see PaymentService)
+    @property
+    def client_name(self):
+        return self.client.name if self.client else None
+
+    @property
+    def received_by_name(self):
+        return self.received_by.name if self.received_by else None
+
+
+# -------------------------
+# Running totals maintained by PaymentAggregates (same transaction as the payment write)
+# -------------------------
+class PaymentClientTotal(Base):
+    __tablename__ = "payment_client_totals"
+
+    client_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_received = Column(Float, nullable=False, default=0)
+    total_discount = Column(Float, nullable=False, default=0)
+    payment_count = Column(Integer, nullable=False, default=0)
+
+class PaymentMethodTotal(Base):
+    __tablename__ = "payment_method_totals"
+
+    method = Column(Enum(PaymentMethod), primary_key=True)
+    total_received = Column(Float, nullable=False, default=0)
+    total_discount = Column(Float, nullable=False, default=0)
+    payment_count = Column(Integer, nullable=False, default=0)
+
+class PaymentDailyRollup(Base):
+    __tablename__ = "payment_daily_rollups"
+
+    day = Column(Date, primary_key=True)
+    client_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    method = Column(Enum(PaymentMethod), primary_key=True)
+    total_received = Column(Float, nullable=False, default=0)
+    total_discount = Column(Float, nullable=False, default=0)
+    payment_count = Column(Integer, nullable=False, default=0)
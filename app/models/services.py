@@ -1,10 +1,13 @@
-from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Date
+from sqlalchemy import Column, String, Integer, Boolean, DateTime, ForeignKey, Text, Float, Date, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.models.base import Base
 
 class Service(Base):
     __tablename__ = "services"
+    __table_args__ = (
+        Index("ix_services_name", "name"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False)
@@ -17,6 +20,14 @@ class Service(Base):
 
 class ServiceAssignment(Base):
     __tablename__ = "service_assignments"
+    __table_args__ = (
+        # Invoice previews and billing runs only read active assignments, per client in id order
+        Index(
+            "ix_service_assignments_active_client_id", "client_id", "id",
+            postgresql_where=text("status IS true"),
+        ),
+        Index("ix_service_assignments_service_id", "service_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     client_id = Column(Integer, ForeignKey("users.id"), nullable=False)
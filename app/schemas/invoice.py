@@ -6,7 +6,9 @@ from typing import Optional
 class InvoiceBase(BaseModel):
     client_id: int
     months: str  # e.g., "January 2025, February 2025"
-    file_path: Optional[str] = None  # e.g., "invoices/invoice_001.pdf"
+    file_path: Optional[str] = None  # e.g., "uploads/invoices/ab/cd/<sha256>.pdf"
+    file_sha256: Optional[str] = None
+    file_size: Optional[int] = None
 
 class InvoiceCreate(InvoiceBase):
     pass  # All required fields for creation are already in InvoiceBase
@@ -54,4 +54,36 @@ class ClientPaymentSummary(PaymentSummary):
 class PaymentStatsResponse(BaseModel):
     overall: PaymentSummary
     by_client: List[ClientPaymentSummary]
-    by_method: dict
\ No newline at end of file
+    by_method: dict
+
+# Payment Rollup Schemas
+class RollupGranularity(str, Enum):
+    day = "day"
+    week = "week"    # ISO weeks, starting Monday
+    month = "month"
+
+class RollupGroupBy(str, Enum):
+    none = "none"
+    client = "client"
+    method = "method"
+
+class PaymentRollupBucket(BaseModel):
+    period_start: date
+    client_id: Optional[int] = None
+    client_name: Optional[str] = None
+    method: Optional[PaymentMethod] = None
+    total_received: float
+    total_discount: float
+    payment_count: int
+
+# Bulk Import Schemas
+class PaymentImportError(BaseModel):
+    row: int  # 1-based, data rows only
+    errors: List[str]
+
+class PaymentImportResponse(BaseModel):
+    received: int
+    imported: int
+    failed: int
+    dry_run: bool
+    errors: List[PaymentImportError]
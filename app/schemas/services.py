@@ -1,4 +1,4 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from typing import Optional, List
 from datetime import datetime, date
 
@@ -41,6 +41,24 @@ class ServiceAssignmentUpdate(BaseModel):
     rate: Optional[float] = None
     service_stop_date: Optional[date] = None
 
+class ServiceAssignmentBulkCreate(BaseModel):
+    assignments: List[ServiceAssignmentCreate] = Field(..., min_length=1, max_length=1000)
+
+class ServiceAssignmentBulkStatusUpdate(BaseModel):
+    status: bool
+    # Filters, combined with AND; at least one is required
+    client_id: Optional[int] = None
+    service_id: Optional[int] = None
+    ids: Optional[List[int]] = None
+    # Stop date for assignments being stopped that have none yet (default: today)
+    service_stop_date: Optional[date] = None
+
+    @model_validator(mode="after")
+    def require_filter(self):
+        if self.client_id is None and self.service_id is None and not self.ids:
+            raise ValueError("Give at least one of client_id, service_id or ids")
+        return self
+
 class ServiceAssignmentResponse(BaseModel):
     id: int
     client_id: int
@@ -90,4 +108,13 @@ class InvoicePreviewMonth(BaseModel):
 
 class InvoicePreviewResponse(BaseModel):
     client_id: int
-    months: List[InvoicePreviewMonth]
\ No newline at end of file
+    months: List[InvoicePreviewMonth]
+
+
+class BillingRunRequest(BaseModel):
+    months: List[date]
+    client_ids: Optional[List[int]] = None  # None = every active client
+
+
+class BillingRunClientPreview(InvoicePreviewResponse):
+    client_name: str
\ No newline at end of file
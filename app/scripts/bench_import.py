@@ -0,0 +1,107 @@
+"""
+Rows per second through PaymentService.import_payments, against the
+one-at-a-time create_payment it replaces for bulk loads.
+
+    python -m app.scripts.bench_import
+    python -m app.scripts.bench_import --rows 1000 10000 100000 --clients 5000
+
+Runs against the configured database. Everything happens inside one
+outer transaction that is rolled back at the end (the services' commits
+only release savepoints), so nothing is left behind. Each import is
+synthetic payments spread over --clients clients and a year of days, so
+the running totals and the daily rollup get thousands of distinct rows.
+
+Exits 1 if any import falls below --min-rate rows per second. Small
+imports are dominated by the fixed cost of the lookups, the commit and
+cache invalidation, so the default sizes start at 10000.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import async_engine
+from app.models.auth import User, UserRole
+from app.models.payments import PaymentMethod
+from app.schemas.payments import PaymentCreate
+from app.services.payments import PaymentService
+
+
+def synthetic_rows(n: int, client_ids, rng: random.Random):
+    methods = [m.value for m in PaymentMethod]
+    return [
+        {
+            "date": (date(2025, 1, 1) + timedelta(days=rng.randrange(365))).isoformat(),
+            "received_amount": str(round(rng.uniform(100, 10000), 2)),
+            "discount": str(rng.choice([0, 5, 10])),
+            "method": rng.choice(methods),
+            "description": f"bench import {i}",
+            "client_id": str(rng.choice(client_ids)),
+        }
+        for i in range(n)
+    ]
+
+
+async def run(args) -> int:
+    rng = random.Random(0)
+    failures = 0
+    async with async_engine.connect() as conn:
+        outer = await conn.begin()
+        try:
+            db = AsyncSession(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False)
+            staff = User(name="bench staff", email="bench-import-staff@example.invalid", password="x",
+                         role=UserRole.admin)
+            db.add(staff)
+            await db.flush()
+            client_ids = (await db.scalars(insert(User).returning(User.id), [
+                {"name": f"bench client {i}", "email": f"bench-import-{i}@example.invalid",
+                 "password": "x", "role": UserRole.client}
+                for i in range(args.clients)
+            ])).all()
+            await db.commit()
+
+            rows = synthetic_rows(args.baseline, client_ids, rng)
+            started = time.perf_counter()
+            for row in rows:
+                await PaymentService.create_payment(db, PaymentCreate.model_validate(row), staff)
+            elapsed = time.perf_counter() - started
+            print(f"{'create_payment':>15}  {len(rows):>7} rows  {elapsed:>7.2f} s  {len(rows) / elapsed:>9.0f} rows/s")
+
+            for n in args.rows:
+                rows = synthetic_rows(n, client_ids, rng)
+                started = time.perf_counter()
+                result = await PaymentService.import_payments(db, rows, staff)
+                elapsed = time.perf_counter() - started
+                rate = n / elapsed
+                note = ""
+                if result["imported"] != n:
+                    failures += 1
+                    note = f"  only {result['imported']} imported"
+                elif rate < args.min_rate:
+                    failures += 1
+                    note = f"  below {args.min_rate:.0f} rows/s"
+                print(f"{'import_payments':>15}  {n:>7} rows  {elapsed:>7.2f} s  {rate:>9.0f} rows/s{note}")
+            await db.close()
+        finally:
+            await outer.rollback()
+    await async_engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--baseline", type=int, default=500, help="rows sent through create_payment one by one")
+    parser.add_argument("--min-rate", type=float, default=10000)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
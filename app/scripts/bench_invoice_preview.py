@@ -0,0 +1,216 @@
+"""
+Time compute_invoice_preview against the per-assignment loop it replaced.
+
+    python -m app.scripts.bench_invoice_preview
+    python -m app.scripts.bench_invoice_preview --assignments 10 100 1000 --months 24
+    python -m app.scripts.bench_invoice_preview --clients 5000 --per-client 3
+
+No database: synthetic preview rows (random start/stop/billing dates,
+rates and statuses) are prorated over --months consecutive months by both
+implementations. The results must be identical; the median of --repeat
+runs is printed for each size.
+
+The billing run is timed the same way over --clients clients with
+--per-client assignments each: the loop per client, NumPy per client, and
+iter_client_previews, which prorates each streamed batch of clients in one
+NumPy pass.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from calendar import monthrange
+from datetime import date
+from typing import NamedTuple, Optional
+
+from app.services.billing import compute_invoice_preview, iter_client_previews
+
+
+class PreviewRow(NamedTuple):
+    """The columns of a preview_rows_query() row that the preview reads."""
+    assignment_id: int
+    service_id: int
+    service_name: str
+    description: str
+    link_capacity: str
+    rate: Optional[float]
+    billing_start_date: date
+    service_start_month: date
+    service_stop_date: Optional[date]
+    status: bool
+
+
+def loop_preview(rows, months):
+    """The original implementation: one pass over the assignments per month."""
+    result = []
+    for m in months:
+        days_in_month = monthrange(m.year, m.month)[1]
+        month_start = date(m.year, m.month, 1)
+        month_end = date(m.year, m.month, days_in_month)
+        services = []
+        for a in rows:
+            if not a.status:
+                continue
+            if a.service_start_month > month_start:
+                continue
+            if a.service_stop_date and a.service_stop_date < month_start:
+                continue
+            if a.billing_start_date > month_end or a.billing_start_date < month_start:
+                continue
+
+            billing_day = a.billing_start_date.day
+            if billing_day <= 1:
+                prorated_days = days_in_month
+            elif billing_day > days_in_month:
+                prorated_days = 0
+            else:
+                prorated_days = days_in_month - (billing_day - 1)
+
+            prorated_amount = 0.0
+            if a.rate and prorated_days > 0:
+                prorated_amount = float(a.rate * prorated_days / days_in_month)
+
+            services.append({
+                "assignment_id": a.assignment_id,
+                "service_id": a.service_id,
+                "service_name": a.service_name,
+                "description": a.description,
+                "link_capacity": a.link_capacity,
+                "rate": a.rate,
+                "billing_start_date": a.billing_start_date,
+                "service_start_month": a.service_start_month,
+                "service_stop_date": a.service_stop_date,
+                "status": a.status,
+                "prorated_days": prorated_days,
+                "prorated_amount": round(prorated_amount, 2),
+            })
+        result.append({
+            "month": month_start,
+            "label": m.strftime("%B %Y"),
+            "days_in_month": days_in_month,
+            "services": services,
+        })
+    return result
+
+
+def synthetic_rows(n: int, months, rng: random.Random):
+    first, last = months[0], months[-1]
+
+    def any_day():
+        month = months[rng.randrange(len(months))]
+        return date(month.year, month.month, rng.randint(1, monthrange(month.year, month.month)[1]))
+
+    rows = []
+    for i in range(n):
+        billing_start = any_day() if rng.random() < 0.8 else any_day().replace(day=1)
+        rows.append(PreviewRow(
+            assignment_id=i,
+            service_id=rng.randrange(1, 20),
+            service_name=f"Service {i % 20}",
+            description="synthetic",
+            link_capacity="100 Mbps",
+            rate=rng.choice([None, 0.0, 1000.0, 3333.33, round(rng.uniform(100, 10000), 2)]),
+            billing_start_date=billing_start,
+            service_start_month=billing_start.replace(day=1) if rng.random() < 0.8 else first,
+            service_stop_date=any_day() if rng.random() < 0.3 else None,
+            status=rng.random() < 0.85,
+        ))
+    assert rows[0].service_start_month <= last
+    return rows
+
+
+# A billing_run_query() row: the preview columns plus the client
+BillingRow = NamedTuple("BillingRow", [*PreviewRow.__annotations__.items(), ("client_id", int), ("client_name", str)])
+
+
+class StreamedRows:
+    """Stands in for the AsyncResult of db.stream(billing_run_query())."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def partitions(self, size: int):
+        for start in range(0, len(self.rows), size):
+            yield self.rows[start:start + size]
+
+
+def billing_rows(clients: int, per_client: int, months, rng: random.Random):
+    return [
+        BillingRow(*row, client_id=c, client_name=f"Client {c}")
+        for c in range(clients)
+        for row in synthetic_rows(per_client, months, rng)
+    ]
+
+
+def per_client(preview, rows, months):
+    results, start = [], 0
+    for end in range(1, len(rows) + 1):
+        if end == len(rows) or rows[end].client_id != rows[start].client_id:
+            client = rows[start]
+            results.append({"client_id": client.client_id, "client_name": client.client_name,
+                            "months": preview(rows[start:end], months)})
+            start = end
+    return results
+
+
+def streamed(rows, months):
+    async def collect():
+        return [preview async for preview in iter_client_previews(StreamedRows(rows), months)]
+    return asyncio.run(collect())
+
+
+def timed(fn, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--assignments", type=int, nargs="+", default=[5, 50, 500, 5000])
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--per-client", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+
+    months = [date(2024 + m // 12, m % 12 + 1, 1) for m in range(args.months)]
+    rng = random.Random(0)
+    failures = 0
+    print(f"{args.months} months")
+    print(f"{'assignments':>11}  {'loop':>10}  {'numpy':>10}  {'speedup':>7}")
+    for n in args.assignments:
+        rows = synthetic_rows(n, months, rng)
+        if compute_invoice_preview(rows, months) != loop_preview(rows, months):
+            failures += 1
+            print(f"{n:>11}  results differ")
+            continue
+        loop_s = timed(lambda: loop_preview(rows, months), args.repeat)
+        numpy_s = timed(lambda: compute_invoice_preview(rows, months), args.repeat)
+        print(f"{n:>11}  {loop_s * 1000:>7.2f} ms  {numpy_s * 1000:>7.2f} ms  {loop_s / numpy_s:>6.1f}x")
+
+    rows = billing_rows(args.clients, args.per_client, months, rng)
+    print(f"\nbilling run: {args.clients} clients x {args.per_client} assignments")
+    expected = per_client(loop_preview, rows, months)
+    if streamed(rows, months) != expected or per_client(compute_invoice_preview, rows, months) != expected:
+        failures += 1
+        print("results differ")
+    else:
+        loop_s = timed(lambda: per_client(loop_preview, rows, months), args.repeat)
+        for label, fn in [
+            ("loop, per client", lambda: per_client(loop_preview, rows, months)),
+            ("numpy, per client", lambda: per_client(compute_invoice_preview, rows, months)),
+            ("numpy, per batch", lambda: streamed(rows, months)),
+        ]:
+            elapsed = timed(fn, args.repeat)
+            print(f"{label:>18}  {elapsed * 1000:>8.2f} ms  {loop_s / elapsed:>6.1f}x")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
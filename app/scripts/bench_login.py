@@ -0,0 +1,121 @@
+"""
+Load-test logins and measure how much they slow down unrelated requests.
+
+    python -m app.scripts.bench_login                    # bcrypt on the hashing pool
+    python -m app.scripts.bench_login --inline-hashing   # bcrypt on the event loop, as before
+
+The app runs in-process on one event loop (like one uvicorn worker),
+against the configured database. A throwaway user is created, then a
+probe requests GET / every few milliseconds, first alone and then while
+--logins logins run with --concurrency in flight. Prints the probe's
+p50/p99 latency in both phases and the login throughput. The user is
+deleted at the end.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+from sqlalchemy import delete
+
+from app.core.config import SessionLocal
+from app.core.security import hash_password, verify_password
+from app.main import app
+from app.models.auth import User, UserRole
+import app.services.auth as auth_service
+
+EMAIL = "bench-login@example.com"
+PASSWORD = "bench-login-password"
+
+
+def create_user():
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.email == EMAIL))
+        db.add(User(name="bench login", email=EMAIL, password=hash_password(PASSWORD), role=UserRole.manager))
+        db.commit()
+
+
+def delete_user():
+    with SessionLocal() as db:
+        db.execute(delete(User).where(User.email == EMAIL))
+        db.commit()
+
+
+async def probe(client: httpx.AsyncClient, stop: asyncio.Event, samples: list):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await client.get("/")
+        samples.append(time.perf_counter() - started)
+        await asyncio.sleep(0.005)
+
+
+async def probe_for(client: httpx.AsyncClient, seconds: float) -> list:
+    samples, stop = [], asyncio.Event()
+    task = asyncio.create_task(probe(client, stop, samples))
+    await asyncio.sleep(seconds)
+    stop.set()
+    await task
+    return samples
+
+
+async def probe_during_logins(client: httpx.AsyncClient, logins: int, concurrency: int):
+    samples, stop, statuses = [], asyncio.Event(), Counter()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            response = await client.post("/api/v1/auth/login", json={"email": EMAIL, "password": PASSWORD})
+            statuses[response.status_code] += 1
+
+    task = asyncio.create_task(probe(client, stop, samples))
+    started = time.perf_counter()
+    await asyncio.gather(*[login() for _ in range(logins)])
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await task
+    return samples, statuses, elapsed
+
+
+def summary(samples: list) -> str:
+    p99 = statistics.quantiles(samples, n=100)[98] if len(samples) > 1 else samples[0]
+    return f"p50 {statistics.median(samples) * 1000:7.1f} ms  p99 {p99 * 1000:7.1f} ms  ({len(samples)} probes)"
+
+
+async def run(args):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get("/")  # warm up
+        idle = await probe_for(client, args.idle_seconds)
+        loaded, statuses, elapsed = await probe_during_logins(client, args.logins, args.concurrency)
+
+    mode = "inline (event loop)" if args.inline_hashing else "hashing pool"
+    print(f"bcrypt: {mode}")
+    print(f"probe, idle:        {summary(idle)}")
+    print(f"probe, with logins: {summary(loaded)}")
+    print(f"logins: {args.logins} in {elapsed:.2f} s ({args.logins / elapsed:.1f}/s), statuses {dict(statuses)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--idle-seconds", type=float, default=2.0)
+    parser.add_argument("--inline-hashing", action="store_true", help="verify passwords on the event loop")
+    args = parser.parse_args()
+
+    if args.inline_hashing:
+        async def verify_inline(plain_password, hashed_password):
+            return verify_password(plain_password, hashed_password)
+        auth_service.verify_password_async = verify_inline
+
+    create_user()
+    try:
+        asyncio.run(run(args))
+    finally:
+        delete_user()
+
+
+if __name__ == "__main__":
+    main()
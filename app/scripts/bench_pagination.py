@@ -0,0 +1,99 @@
+"""
+Time deep pages of GET /payments/: OFFSET (skip) against the keyset cursor.
+
+Run against a local Postgres migrated to head:
+
+    python -m app.scripts.bench_pagination                   # 1M synthetic payments
+    python -m app.scripts.bench_pagination --rows 200000 --depths 0 10000 100000
+
+The synthetic payments are inserted with generate_series inside a
+transaction that is rolled back at the end, so nothing is left behind.
+For each depth the page query the service builds is run with skip=depth
+and with the cursor of the row just before that depth; the median of
+--repeat runs is printed for both.
+"""
+import argparse
+import statistics
+import time
+
+from sqlalchemy import insert, select, text
+
+from app.core.config import SessionLocal
+from app.core.pagination import encode_cursor, keyset_paginate
+from app.models.auth import User, UserRole
+from app.models.payments import Payment
+from app.services.payments import _payment_rows
+
+PAGE_SIZE = 100
+
+
+def seed(db, rows: int):
+    staff_id = db.scalar(insert(User).values(
+        name="bench staff", email="bench-pagination-staff@example.invalid", password="x", role=UserRole.admin
+    ).returning(User.id))
+    client_ids = db.scalars(insert(User).returning(User.id), [
+        {"name": f"bench client {i}", "email": f"bench-pagination-{i}@example.invalid",
+         "password": "x", "role": UserRole.client}
+        for i in range(100)
+    ]).all()
+    db.execute(text("""
+        INSERT INTO payments (date, received_amount, discount, method, client_id, received_by_id)
+        SELECT current_date - (g % 730),
+               500,
+               0,
+               (ARRAY['cash', 'bank_transfer', 'bkash']::paymentmethod[])[1 + g % 3],
+               (:client_ids)[1 + g % cardinality(:client_ids)],
+               :staff_id
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows, "client_ids": list(client_ids), "staff_id": staff_id})
+    db.execute(text("ANALYZE users"))
+    db.execute(text("ANALYZE payments"))
+
+
+def page(skip: int = 0, cursor: str = None):
+    return keyset_paginate(_payment_rows(), [Payment.date, Payment.id], cursor, skip, PAGE_SIZE, descending=True)
+
+
+def timed(db, stmt, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        db.execute(stmt).all()
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--depths", type=int, nargs="+", default=[0, 10_000, 100_000, 500_000, 900_000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        seed(db, args.rows)
+        print(f"seeded {args.rows} payments in {time.perf_counter() - started:.1f} s")
+        print(f"{'depth':>9}  {'offset':>10}  {'keyset':>10}")
+        for depth in args.depths:
+            if depth >= args.rows:
+                continue
+            cursor = None
+            if depth:
+                # The cursor a client holds after paging down to `depth`
+                last = db.execute(
+                    keyset_paginate(select(Payment.date, Payment.id),
+                                    [Payment.date, Payment.id], None, depth - 1, 1, descending=True)
+                ).one()
+                cursor = encode_cursor([last.date, last.id])
+            offset_ms = timed(db, page(skip=depth), args.repeat) * 1000
+            keyset_ms = timed(db, page(cursor=cursor), args.repeat) * 1000
+            print(f"{depth:>9}  {offset_ms:>7.1f} ms  {keyset_ms:>7.1f} ms")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+"""
+Time a one-month /payments/date-range query with EXPLAIN ANALYZE, on a
+plain or a partitioned payments table.
+
+Run against a local Postgres, once at main@head and once after
+`alembic upgrade payments_partitioning@head`:
+
+    python -m app.scripts.bench_partition_pruning
+    python -m app.scripts.bench_partition_pruning --rows 200000 --months 12
+
+Synthetic payments spread over the last --months months are inserted with
+generate_series inside a transaction that is rolled back at the end, so
+nothing is left behind. When the table is partitioned, each of those
+months gets its partition first, as the migration does for existing data.
+Prints the relations the query touched, the buffers it read and the median
+planning and execution time of --repeat runs.
+"""
+import argparse
+import json
+import statistics
+from datetime import date
+
+from sqlalchemy import insert, text
+
+from app.core.config import SessionLocal
+from app.models.auth import User, UserRole
+from app.models.payments import Payment
+from app.scripts.check_query_plans import scanned_relations
+from app.services.payment_partitions import PaymentPartitions, _add_months
+from app.services.payments import _payment_rows
+
+
+def seed(db, rows: int, months: int):
+    staff_id = db.scalar(insert(User).values(
+        name="bench staff", email="bench-pruning-staff@example.invalid", password="x", role=UserRole.admin
+    ).returning(User.id))
+    client_ids = db.scalars(insert(User).returning(User.id), [
+        {"name": f"bench client {i}", "email": f"bench-pruning-{i}@example.invalid",
+         "password": "x", "role": UserRole.client}
+        for i in range(100)
+    ]).all()
+    first = _add_months(date.today().replace(day=1), -(months - 1))
+    if PaymentPartitions.is_partitioned(db.connection()):
+        for i in range(months):
+            PaymentPartitions.create_partition(db.connection(), _add_months(first, i))
+    db.execute(text("""
+        INSERT INTO payments (date, received_amount, discount, method, client_id, received_by_id)
+        SELECT :first + (g % (current_date - :first + 1)),
+               500,
+               0,
+               (ARRAY['cash', 'bank_transfer', 'bkash']::paymentmethod[])[1 + g % 3],
+               (:client_ids)[1 + g % cardinality(:client_ids)],
+               :staff_id
+        FROM generate_series(1, :rows) AS g
+    """), {"rows": rows, "first": first, "client_ids": list(client_ids), "staff_id": staff_id})
+    db.execute(text("ANALYZE users"))
+    db.execute(text("ANALYZE payments"))
+    return first
+
+
+def buffers(plan: dict) -> int:
+    return plan.get("Shared Hit Blocks", 0) + plan.get("Shared Read Blocks", 0)
+
+
+def explain_analyze(db, stmt) -> dict:
+    sql = str(stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}))
+    result = db.execute(text("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql.replace(":", r"\:"))).scalar()
+    return (json.loads(result) if isinstance(result, str) else result)[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--months", type=int, default=24)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        partitioned = PaymentPartitions.is_partitioned(db.connection())
+        first = seed(db, args.rows, args.months)
+        # A full month in the middle of the seeded range
+        month = _add_months(first, args.months // 2)
+        stmt = _payment_rows().where(Payment.date >= month, Payment.date < _add_months(month, 1))
+
+        runs = [explain_analyze(db, stmt) for _ in range(args.repeat + 1)][1:]  # first run warms the cache
+        plan = runs[-1]["Plan"]
+        relations = sorted(r for r in scanned_relations(plan) if r.startswith("payments"))
+        print(f"payments: {'partitioned' if partitioned else 'plain'}, {args.rows} rows over {args.months} months")
+        print(f"query:    one month ({month:%B %Y}), {plan['Actual Rows']} rows")
+        print(f"scanned:  {', '.join(relations)}")
+        print(f"buffers:  {buffers(plan)}")
+        print(f"planning:  {statistics.median(r['Planning Time'] for r in runs):.2f} ms")
+        print(f"execution: {statistics.median(r['Execution Time'] for r in runs):.2f} ms")
+    finally:
+        db.rollback()
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
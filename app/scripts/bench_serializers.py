@@ -0,0 +1,125 @@
+"""
+Per-row cost of a list response: FastAPI's response_model path against ListSerializer.
+
+    python -m app.scripts.bench_serializers
+    python -m app.scripts.bench_serializers --rows 100 1000 10000
+
+No database. A throwaway FastAPI app serves the same synthetic payments
+two ways, and both are requested in-process:
+
+  /orm   Payment objects with client and received_by loaded, returned
+         with response_model=List[PaymentResponse] (the old list path)
+  /rows  flat rows shaped like _payment_rows(), returned through
+         ListSerializer(PaymentResponse) (the current list path)
+
+The two bodies must decode to the same JSON. Prints the median request
+time of --repeat runs and the cost per row.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import sys
+import time
+from datetime import date, datetime, timedelta, timezone
+from typing import List, NamedTuple, Optional
+
+import httpx
+from fastapi import FastAPI
+
+from app.core.responses import ListSerializer
+from app.models.auth import User, UserRole
+from app.models.payments import Payment, PaymentMethod
+from app.schemas.payments import PaymentResponse
+
+
+class PaymentRow(NamedTuple):
+    """Attribute access like the sqlalchemy Rows _payment_rows() returns."""
+    id: int
+    date: date
+    received_amount: float
+    discount: Optional[float]
+    method: PaymentMethod
+    description: Optional[str]
+    client_id: int
+    client_name: str
+    received_by_id: int
+    received_by_name: str
+    created_at: datetime
+    updated_at: Optional[datetime]
+
+
+def synthetic_payments(n: int):
+    staff = User(id=1, name="Staff", email="staff@example.invalid", password="x", role=UserRole.admin)
+    clients = [User(id=100 + i, name=f"Client {i}", email=f"client-{i}@example.invalid", password="x",
+                    role=UserRole.client) for i in range(50)]
+    methods = list(PaymentMethod)
+    created = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    payments, rows = [], []
+    for i in range(n):
+        client = clients[i % len(clients)]
+        values = dict(
+            id=i + 1, date=date(2025, 1, 1) + timedelta(days=i % 365), received_amount=500.0 + i,
+            discount=5.0 if i % 3 else None, method=methods[i % len(methods)],
+            description=f"payment {i}" if i % 2 else None, client_id=client.id, received_by_id=staff.id,
+            created_at=created + timedelta(minutes=i), updated_at=None,
+        )
+        payments.append(Payment(**values, client=client, received_by=staff))
+        rows.append(PaymentRow(**values, client_name=client.name, received_by_name=staff.name))
+    return payments, rows
+
+
+def bench_app(payments, rows) -> FastAPI:
+    app = FastAPI()
+    payment_list = ListSerializer(PaymentResponse)
+
+    @app.get("/orm", response_model=List[PaymentResponse])
+    async def orm():
+        return payments
+
+    @app.get("/rows", response_model=List[PaymentResponse])
+    async def flat_rows():
+        return payment_list.response(rows)
+
+    return app
+
+
+async def timed(client: httpx.AsyncClient, path: str, repeat: int):
+    body = (await client.get(path)).content  # warm up
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await client.get(path)
+        samples.append(time.perf_counter() - started)
+    return statistics.median(samples), body
+
+
+async def run(args) -> int:
+    failures = 0
+    print(f"{'rows':>7}  {'response_model':>20}  {'ListSerializer':>20}  {'speedup':>7}")
+    for n in args.rows:
+        app = bench_app(*synthetic_payments(n))
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+            orm_s, orm_body = await timed(client, "/orm", args.repeat)
+            rows_s, rows_body = await timed(client, "/rows", args.repeat)
+        if json.loads(orm_body) != json.loads(rows_body):
+            failures += 1
+            print(f"{n:>7}  responses differ")
+            continue
+        print(
+            f"{n:>7}  {orm_s * 1000:>8.1f} ms {orm_s / n * 1e6:>6.2f} us/row"
+            f"  {rows_s * 1000:>8.1f} ms {rows_s / n * 1e6:>6.2f} us/row  {orm_s / rows_s:>6.1f}x"
+        )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=7)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+"""
+EXPLAIN the hot service queries and fail if the planner filters a large table with a sequential scan.
+
+Run against a local Postgres migrated to head:
+
+    python -m app.scripts.check_query_plans                # use the data already there
+    python -m app.scripts.check_query_plans --seed 200000
+
+--seed inserts synthetic clients, assignments, payments and invoices inside
+a transaction that is rolled back at the end, so nothing is left behind.
+It needs to be large enough for indexes to be worth using; around 200000
+payments is.
+
+Plans use the default planner settings. A sequential scan fails the check
+when its filter keeps under a tenth of a table of at least --min-rows rows:
+that is what a missing or unusable index looks like. Scans of small
+tables, and scans that keep most of the table, are what the planner should
+choose. For each failure the plan with sequential scans disabled is
+reported too, showing whether an index path exists at all. Exits 1 when
+any query fails.
+
+When payments is partitioned (payments_partitioning migration branch), a
+one-month /payments/date-range query must also prune to that month's
+partition.
+"""
+import argparse
+import json
+import random
+import sys
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select, text
+
+from app.core.config import SessionLocal
+from app.core.pagination import encode_cursor, keyset_paginate
+from app.models.auth import User, UserRole
+from app.models.invoice import Invoice
+from app.models.payments import Payment, PaymentDailyRollup, PaymentMethod
+from app.models.services import Service, ServiceAssignment
+from app.services.billing import billing_run_query, preview_rows_query
+from app.services.payment_partitions import PaymentPartitions, partition_name
+from app.services.payments import _payment_rows
+
+
+def service_queries(client_id: int) -> dict:
+    """The statements the services run, with representative parameters."""
+    today = date.today()
+    months = [date(today.year, today.month, 1)]
+    month_ago = today - timedelta(days=31)
+    year_ago = today - timedelta(days=365)
+    return {
+        "payments.list": keyset_paginate(
+            _payment_rows(), [Payment.date, Payment.id], None, 0, 100, descending=True
+        ),
+        "payments.list(cursor)": keyset_paginate(
+            _payment_rows(), [Payment.date, Payment.id], encode_cursor([today, 10 ** 9]), 0, 100, descending=True
+        ),
+        "payments.by_client": _payment_rows().where(Payment.client_id == client_id),
+        "payments.by_date_range": _payment_rows().where(Payment.date >= month_ago, Payment.date <= today),
+        "payments.rollup": select(PaymentDailyRollup).where(
+            PaymentDailyRollup.day >= year_ago, PaymentDailyRollup.day <= today
+        ),
+        "clients.list": keyset_paginate(select(User.id).where(User.role == UserRole.client), [User.id], None, 0, 100),
+        "services.by_name": select(Service).where(Service.name == "Internet"),
+        "assignments.preview": preview_rows_query(months, [client_id]),
+        "assignments.billing_run": billing_run_query(months),
+        "invoices.list": keyset_paginate(
+            select(Invoice), [Invoice.created_date, Invoice.id], None, 0, 100, descending=True
+        ),
+        "invoices.by_client": keyset_paginate(
+            select(Invoice).where(Invoice.client_id == client_id),
+            [Invoice.created_date, Invoice.id], None, 0, 100, descending=True
+        ),
+        "invoices.by_created_date": keyset_paginate(
+            select(Invoice).where(Invoice.created_date >= year_ago),
+            [Invoice.created_date, Invoice.id], None, 0, 100, descending=True
+        ),
+    }
+
+
+def seed(db, rows: int):
+    """Synthetic data, roughly 20 payments and 2 assignments per client."""
+    rng = random.Random(0)
+    today = date.today()
+    n_clients = max(rows // 20, 10)
+
+    staff_id = db.scalar(insert(User).values(
+        name="plan-check staff", email="plan-check-staff@example.invalid",
+        password="x", role=UserRole.admin
+    ).returning(User.id))
+    client_ids = db.scalars(insert(User).returning(User.id), [
+        {"name": f"plan-check {i}", "email": f"plan-check-{i}@example.invalid",
+         "password": "x", "role": UserRole.client}
+        for i in range(n_clients)
+    ]).all()
+    service_ids = db.scalars(insert(Service).returning(Service.id), [
+        {"name": f"plan-check service {i}", "created_by": "plan-check"} for i in range(10)
+    ]).all()
+
+    db.execute(insert(ServiceAssignment), [
+        {"client_id": rng.choice(client_ids), "service_id": rng.choice(service_ids),
+         "service_start_month": today.replace(day=1), "billing_start_date": today.replace(day=1),
+         "status": rng.random() < 0.8, "description": "plan-check", "link_capacity": "10 Mbps",
+         "rate": 1000.0, "created_by": "plan-check"}
+        for _ in range(n_clients * 2)
+    ])
+    methods = list(PaymentMethod)
+    db.execute(insert(Payment), [
+        {"date": today - timedelta(days=rng.randrange(730)), "received_amount": 500.0,
+         "discount": 0.0, "method": rng.choice(methods), "client_id": rng.choice(client_ids),
+         "received_by_id": staff_id}
+        for _ in range(rows)
+    ])
+    db.execute(insert(Invoice), [
+        {"invoice_number": f"PLAN-CHECK-{i}", "client_id": rng.choice(client_ids),
+         "months": today.strftime("%B %Y"), "created_date": today - timedelta(days=rng.randrange(730))}
+        for i in range(rows // 4)
+    ])
+    db.execute(text("ANALYZE"))
+    return client_ids[0]
+
+
+# A filtered sequential scan keeping less than this share of its table is a missing index
+SELECTIVE = 0.1
+
+
+def seq_scans(plan: dict) -> list:
+    """Seq Scan nodes anywhere in an EXPLAIN (FORMAT JSON) plan."""
+    found = [plan] if plan.get("Node Type") == "Seq Scan" else []
+    for child in plan.get("Plans", []):
+        found.extend(seq_scans(child))
+    return found
+
+
+def table_rows(db, relation: str) -> float:
+    return db.scalar(text("SELECT reltuples FROM pg_class WHERE relname = :relation"), {"relation": relation}) or 0
+
+
+def wasteful_seq_scans(db, plan: dict, min_rows: int) -> list:
+    """Relations a sequential scan reads in full to keep only a few of their rows."""
+    found = []
+    for scan in seq_scans(plan):
+        rows = table_rows(db, scan["Relation Name"])
+        if "Filter" in scan and rows >= min_rows and scan["Plan Rows"] < SELECTIVE * rows:
+            found.append(f"{scan['Relation Name']} (~{scan['Plan Rows']} of {rows:.0f} rows)")
+    return found
+
+
+def scanned_relations(plan: dict) -> set:
+    found = {plan["Relation Name"]} if "Relation Name" in plan else set()
+    for child in plan.get("Plans", []):
+        found |= scanned_relations(child)
+    return found
+
+
+def explain(db, stmt, seqscan: bool = True) -> dict:
+    db.execute(text(f"SET LOCAL enable_seqscan = {'on' if seqscan else 'off'}"))
+    sql = str(stmt.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True}))
+    plan = db.execute(text("EXPLAIN (FORMAT JSON) " + sql.replace(":", r"\:"))).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return plan[0]["Plan"]
+
+
+def check_pruning(db) -> bool:
+    """A one-month date range must only touch that month's partition."""
+    month = date.today().replace(day=1)
+    next_month = (month + timedelta(days=32)).replace(day=1)
+    stmt = _payment_rows().where(Payment.date >= month, Payment.date < next_month)
+    partitions = {r for r in scanned_relations(explain(db, stmt)) if r.startswith("payments_")}
+    if partitions == {partition_name(month)}:
+        print(f"ok   payments.by_date_range(1 month): pruned to {partition_name(month)}")
+        return True
+    print(f"FAIL payments.by_date_range(1 month): scanned {', '.join(sorted(partitions))}")
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seed", type=int, default=0, help="insert this many synthetic payments first")
+    parser.add_argument("--min-rows", type=int, default=10_000, help="smaller tables may always be scanned")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    failures = 0
+    try:
+        if args.seed:
+            client_id = seed(db, args.seed)
+        else:
+            client_id = db.scalar(select(User.id).where(User.role == UserRole.client).limit(1)) or 1
+
+        for name, stmt in service_queries(client_id).items():
+            scans = wasteful_seq_scans(db, explain(db, stmt), args.min_rows)
+            if not scans:
+                print(f"ok   {name}")
+                continue
+            failures += 1
+            forced = {scan["Relation Name"] for scan in seq_scans(explain(db, stmt, seqscan=False))}
+            print(f"FAIL {name}: seq scan on {', '.join(scans)}")
+            if forced:
+                print(f"     with seq scans disabled: still on {', '.join(sorted(forced))}, no usable index")
+            else:
+                print("     with seq scans disabled: uses an index, which the planner judged slower")
+
+        if PaymentPartitions.is_partitioned(db.connection()) and not check_pruning(db):
+            failures += 1
+    finally:
+        db.rollback()
+        db.close()
+
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
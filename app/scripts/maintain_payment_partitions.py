@@ -0,0 +1,38 @@
+"""
+Create upcoming monthly payment partitions and detach old ones.
+
+Only does anything once the opt-in payments_partitioning migration has
+been applied. Safe to run from cron alongside the app:
+
+    python -m app.scripts.maintain_payment_partitions
+    python -m app.scripts.maintain_payment_partitions --ahead 6 --detach-before 2024-01-01
+"""
+import argparse
+from datetime import date
+
+from app.core.config import engine
+from app.core.settings import settings
+from app.services.payment_partitions import PaymentPartitions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ahead", type=int, default=settings.PAYMENT_PARTITIONS_AHEAD,
+                        help="months after the current one that must have a partition")
+    parser.add_argument("--detach-before", type=date.fromisoformat, default=None,
+                        help="detach partitions for months ending on or before this date (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if not PaymentPartitions.is_partitioned(conn):
+            print("payments is not partitioned; nothing to do")
+            return
+        created = PaymentPartitions.ensure_future(conn, args.ahead)
+        detached = PaymentPartitions.detach_before(conn, args.detach_before) if args.detach_before else []
+
+    print(f"Created: {', '.join(created) or 'none'}")
+    print(f"Detached: {', '.join(detached) or 'none'}")
+
+
+if __name__ == "__main__":
+    main()
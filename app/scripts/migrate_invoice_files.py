@@ -0,0 +1,159 @@
+"""
+Move invoice PDFs from the old flat layout (uploads/invoices/<number>.pdf)
+into the content-addressed store and record their hash and size.
+
+    python -m app.scripts.migrate_invoice_files             # old files are kept
+    python -m app.scripts.migrate_invoice_files --delete    # and removed once migrated
+    python -m app.scripts.migrate_invoice_files --dry-run
+
+Only invoices without file_sha256 are touched, so it is safe to re-run or
+to interrupt. Each batch of files is linked (or copied) into the store and
+the rows are committed before any old file is deleted.
+
+When switching INVOICE_STORAGE_BACKEND from local to s3, the files already
+in the local store (INVOICE_STORE_DIR) have to be uploaded as well; run
+this with the s3 settings in place:
+
+    python -m app.scripts.migrate_invoice_files --copy-local-store [--dry-run]
+
+Every invoice with a file_sha256 whose file_path is not yet in the bucket
+is uploaded (once per distinct file) and repointed. The local copies are
+left alone, to be removed once the bucket has been checked.
+"""
+import argparse
+import os
+
+from sqlalchemy import exists, select, update
+
+from app.core.config import SessionLocal
+from app.core.response_cache import invalidate_sync
+from app.models.invoice import Invoice
+from app.utils.file_store import S3Store, invoice_store, invoice_store_for
+
+
+def migrate_flat_files(db, args):
+    migrated = missing = deleted = 0
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Invoice.id, Invoice.file_path)
+            .where(Invoice.file_sha256.is_(None), Invoice.file_path.isnot(None), Invoice.id > last_id)
+            .order_by(Invoice.id)
+            .limit(args.batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        moved = []
+        for row in rows:
+            if not os.path.isfile(row.file_path):
+                print(f"missing  invoice {row.id}: {row.file_path}")
+                missing += 1
+                continue
+            if args.dry_run:
+                print(f"would migrate invoice {row.id}: {row.file_path}")
+                migrated += 1
+                continue
+            stored = invoice_store.add_file(row.file_path)
+            db.execute(
+                update(Invoice)
+                .where(Invoice.id == row.id)
+                .values(file_path=stored.path, file_sha256=stored.sha256, file_size=stored.size)
+            )
+            moved.append((row.id, row.file_path, stored.path))
+        if args.dry_run:
+            continue
+
+        db.commit()
+        migrated += len(moved)
+        invalidate_sync(*[f"invoice:{invoice_id}" for invoice_id, _, _ in moved])
+
+        if args.delete:
+            for _, old_path, new_path in moved:
+                still_used = db.scalar(select(exists().where(Invoice.file_path == old_path)))
+                if old_path != new_path and not still_used and os.path.exists(old_path):
+                    os.unlink(old_path)
+                    deleted += 1
+            db.rollback()  # end the read-only transaction
+
+    verb = "would migrate" if args.dry_run else "migrated"
+    print(f"{verb} {migrated} invoice file(s), {missing} missing, {deleted} old file(s) deleted")
+
+
+def copy_local_store(db, args):
+    if not isinstance(invoice_store, S3Store):
+        raise SystemExit("--copy-local-store needs INVOICE_STORAGE_BACKEND=s3")
+    local = invoice_store_for("local")
+    bucket_prefix = f"s3://{invoice_store.bucket}/"
+
+    copied = skipped = 0
+    uploaded = {}  # sha256 -> location, each distinct file is sent once
+    last_id = 0
+    while True:
+        rows = db.execute(
+            select(Invoice.id, Invoice.file_sha256)
+            .where(Invoice.file_sha256.isnot(None), ~Invoice.file_path.startswith(bucket_prefix),
+                   Invoice.id > last_id)
+            .order_by(Invoice.id)
+            .limit(args.batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        repointed = []
+        for row in rows:
+            source = local.path(row.file_sha256)
+            if not os.path.isfile(source):
+                print(f"missing  invoice {row.id}: {source}")
+                skipped += 1
+                continue
+            if args.dry_run:
+                print(f"would copy invoice {row.id}: {source}")
+                copied += 1
+                continue
+            if row.file_sha256 not in uploaded:
+                stored = invoice_store.add_file(source)
+                if stored.sha256 != row.file_sha256:
+                    print(f"corrupt  invoice {row.id}: {source} hashes to {stored.sha256}")
+                    skipped += 1
+                    continue
+                uploaded[row.file_sha256] = stored.path
+            db.execute(update(Invoice).where(Invoice.id == row.id).values(file_path=uploaded[row.file_sha256]))
+            repointed.append(row.id)
+        if args.dry_run:
+            continue
+
+        db.commit()
+        copied += len(repointed)
+        invalidate_sync(*[f"invoice:{invoice_id}" for invoice_id in repointed])
+
+    verb = "would copy" if args.dry_run else "copied"
+    print(f"{verb} {copied} invoice file(s) to {bucket_prefix} ({len(uploaded)} uploaded), {skipped} missing or corrupt")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--delete", action="store_true", help="remove each old file once its rows point at the store")
+    parser.add_argument("--dry-run", action="store_true", help="only report what would be migrated")
+    parser.add_argument("--copy-local-store", action="store_true",
+                        help="upload files already in INVOICE_STORE_DIR to the S3 bucket")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        if args.copy_local_store:
+            copy_local_store(db, args)
+        else:
+            migrate_flat_files(db, args)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""
+Recompute the payment running totals and daily rollups from the payments table.
+
+Run after a backfill or a manual data fix:
+
+    python -m app.scripts.rebuild_payment_aggregates
+"""
+from app.core.config import SessionLocal
+from app.core.response_cache import invalidate_sync
+from app.services.payment_aggregates import PaymentAggregates
+
+
+def main():
+    db = SessionLocal()
+    try:
+        PaymentAggregates.rebuild(db)
+        db.commit()
+        invalidate_sync("payments")
+        print("Payment aggregates rebuilt")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,11 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from jose import jwt
 
 from app.core.security import (
-    hash_password, 
-    verify_password, 
+    hash_password_async,
+    verify_password_async,
     create_access_token, 
     create_refresh_token,
     revoke_token
@@ -15,9 +16,9 @@ from app.schemas.auth import UserCreate, UserLogin, UserOut
 
 class AuthService:
     @staticmethod
-    def register_user(db: Session, user_data: UserCreate) -> UserOut:
+    async def register_user(db: AsyncSession, user_data: UserCreate) -> UserOut:
         # Check if user already exists
-        existing_user = db.query(User).filter(User.email == user_data.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == user_data.email))
         if existing_user:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -25,7 +26,7 @@ class AuthService:
             )
         
         # Create new user
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         user = User(
             name=user_data.full_name,
             email=user_data.email,
@@ -34,16 +35,16 @@ class AuthService:
         )
         
         db.add(user)
-        db.commit()
-        db.refresh(user)
+        await db.commit()
+        await db.refresh(user)
         
         return UserOut.from_orm(user)
     
     @staticmethod
-    def login_user(db: Session, login_data: UserLogin):
+    async def login_user(db: AsyncSession, login_data: UserLogin):
         # Find user by email
-        user = db.query(User).filter(User.email == login_data.email).first()
-        if not user or not verify_password(login_data.password, user.password):
+        user = await db.scalar(select(User).where(User.email == login_data.email))
+        if not user or not await verify_password_async(login_data.password, user.password):
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail="Invalid credentials"
@@ -67,7 +68,7 @@ class AuthService:
         return {"message": "Successfully logged out"}
     
     @staticmethod  # Fixed indentation - this was outside the class!
-    def get_current_user(db: Session, token: str):
+    async def get_current_user(db: AsyncSession, token: str):
         try:
             # Decode token
             payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
@@ -77,7 +78,7 @@ class AuthService:
                 raise HTTPException(status_code=401, detail="Invalid token")
             
             # Find user in database
-            user = db.query(User).filter(User.email == email).first()
+            user = await db.scalar(select(User).where(User.email == email))
             if not user:
                 raise HTTPException(status_code=404, detail="User not found")
                 
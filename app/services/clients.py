@@ -1,14 +1,19 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
+from typing import Optional
+from app.core.pagination import Page, keyset_paginate, make_page
+from app.core.responses import response_columns
+from app.schemas.clients import ClientResponse
 from app.models.auth import User, UserRole
 
 class ClientService:
     @staticmethod
-    def create_client(db: Session, client_data, current_user):
+    async def create_client(db: AsyncSession, client_data, current_user):
         if current_user.role not in [UserRole.superadmin, UserRole.admin]:
             raise HTTPException(status_code=403, detail="Not authorized")
         
-        existing_user = db.query(User).filter(User.email == client_data.email).first()
+        existing_user = await db.scalar(select(User).where(User.email == client_data.email))
         if existing_user:
             raise HTTPException(status_code=400, detail="Email exists")
         
@@ -22,26 +27,31 @@ class ClientService:
             phone=client_data.phone
         )
         db.add(client)
-        db.commit()
-        db.refresh(client)
+        await db.commit()
+        await db.refresh(client)
         return client
 
     @staticmethod
-    def get_clients(db: Session, current_user, skip: int = 0, limit: int = 100):
+    async def get_clients(db: AsyncSession, current_user, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
         if current_user.role not in [UserRole.superadmin, UserRole.admin]:
             raise HTTPException(status_code=403, detail="Not authorized")
-        return db.query(User).filter(User.role == UserRole.client).offset(skip).limit(limit).all()
+        stmt = keyset_paginate(
+            select(*response_columns(User, ClientResponse)).where(User.role == UserRole.client),
+            [User.id], cursor, skip, limit
+        )
+        result = await db.execute(stmt)
+        return make_page(result.all(), limit, ["id"])
 
     @staticmethod
-    def update_client_status(db: Session, client_id: int, active: bool, current_user):
+    async def update_client_status(db: AsyncSession, client_id: int, active: bool, current_user):
         if current_user.role not in [UserRole.superadmin, UserRole.admin]:
             raise HTTPException(status_code=403, detail="Not authorized")
         
-        client = db.query(User).filter(User.id == client_id, User.role == UserRole.client).first()
+        client = await db.scalar(select(User).where(User.id == client_id, User.role == UserRole.client))
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
         client.active = active
-        db.commit()
-        db.refresh(client)
-        return client
\ No newline at end of file
+        await db.commit()
+        await db.refresh(client)
+        return client
@@ -0,0 +1,134 @@
+from collections import defaultdict
+from typing import Iterable, NamedTuple
+
+from sqlalchemy import bindparam, delete, func, insert, select, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.payments import Payment, PaymentClientTotal, PaymentMethodTotal, PaymentDailyRollup
+
+
+class PaymentSnapshot(NamedTuple):
+    """The fields the aggregates depend on, captured before a payment is changed."""
+    client_id: int
+    method: object
+    date: object
+    received_amount: float
+    discount: float
+
+
+def snapshot(payment) -> PaymentSnapshot:
+    return PaymentSnapshot(
+        payment.client_id,
+        payment.method,
+        payment.date,
+        payment.received_amount or 0.0,
+        payment.discount or 0.0,
+    )
+
+
+_TOTAL_COLUMNS = ("total_received", "total_discount", "payment_count")
+
+
+def _upsert_totals(model, keys: tuple, unnest: bool):
+    """
+    INSERT ... ON CONFLICT DO UPDATE adding totals onto the existing running
+    totals. With `unnest`, every row arrives as one array per column in a
+    single statement (PostgreSQL); otherwise the statement is run once per
+    row (executemany).
+    """
+    # On the Table rather than the class: plain Core, without the ORM
+    # bulk-insert bookkeeping per row
+    table = model.__table__
+    if unnest:
+        columns = keys + _TOTAL_COLUMNS
+        stmt = pg_insert(table).from_select(columns, select(*[
+            func.unnest(bindparam(c, type_=ARRAY(table.c[c].type))).label(c) for c in columns
+        ]))
+    else:
+        stmt = pg_insert(table)
+    return stmt.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={c: table.c[c] + stmt.excluded[c] for c in _TOTAL_COLUMNS},
+    )
+
+
+def _totals_rows(keys: tuple, totals: dict):
+    # Fixed key order so concurrent writers lock rows in the same order
+    return [
+        {**dict(zip(keys, k)), "total_received": received, "total_discount": discount, "payment_count": count}
+        for k, (received, discount, count) in sorted(totals.items(), key=lambda item: str(item[0]))
+    ]
+
+
+class PaymentAggregates:
+    """
+    Per-client and per-method running totals behind /payments/stats, and
+    the per-day rollup behind /payments/rollup.
+
+    Every write path in PaymentService calls apply() before committing, so
+    the totals change in the same transaction as the payments themselves.
+    """
+
+    @staticmethod
+    def deltas(added: Iterable = (), removed: Iterable = ()):
+        """Net change per aggregate row, keyed by that row's primary key tuple."""
+        per_client = defaultdict(lambda: [0.0, 0.0, 0])
+        per_method = defaultdict(lambda: [0.0, 0.0, 0])
+        per_day = defaultdict(lambda: [0.0, 0.0, 0])
+        for sign, payments in ((1, added), (-1, removed)):
+            for p in payments:
+                p = p if isinstance(p, PaymentSnapshot) else snapshot(p)
+                buckets = (
+                    per_client[(p.client_id,)],
+                    per_method[(p.method,)],
+                    per_day[(p.date, p.client_id, p.method)],
+                )
+                for bucket in buckets:
+                    bucket[0] += sign * p.received_amount
+                    bucket[1] += sign * p.discount
+                    bucket[2] += sign
+        return per_client, per_method, per_day
+
+    @staticmethod
+    async def apply(db: AsyncSession, added: Iterable = (), removed: Iterable = ()):
+        """Add `added` payments to the totals and subtract `removed` ones."""
+        per_client, per_method, per_day = PaymentAggregates.deltas(added, removed)
+        unnest = db.get_bind().dialect.name == "postgresql"
+        for model, keys, totals in (
+            (PaymentClientTotal, ("client_id",), per_client),
+            (PaymentMethodTotal, ("method",), per_method),
+            (PaymentDailyRollup, ("day", "client_id", "method"), per_day),
+        ):
+            # Not a multi-row VALUES: that is compiled afresh for every size
+            # and needs a bind parameter per value, where asyncpg allows
+            # 32767 per statement
+            if not totals:
+                continue
+            rows = _totals_rows(keys, totals)
+            if unnest:
+                rows = {c: [row[c] for row in rows] for c in keys + _TOTAL_COLUMNS}
+            await db.execute(_upsert_totals(model, keys, unnest), rows)
+
+    @staticmethod
+    def rebuild(db: Session):
+        """Recompute every total from the payments table (backfills, drift repair)."""
+        # Block payment writes for the duration so the totals match a single snapshot
+        db.execute(text("LOCK TABLE payments IN SHARE MODE"))
+        targets = (
+            (PaymentClientTotal, ["client_id"], [Payment.client_id]),
+            (PaymentMethodTotal, ["method"], [Payment.method]),
+            (PaymentDailyRollup, ["day", "client_id", "method"], [Payment.date, Payment.client_id, Payment.method]),
+        )
+        for model, key_names, key_columns in targets:
+            db.execute(delete(model))
+            db.execute(insert(model).from_select(
+                key_names + ["total_received", "total_discount", "payment_count"],
+                select(
+                    *key_columns,
+                    func.coalesce(func.sum(Payment.received_amount), 0.0),
+                    func.coalesce(func.sum(Payment.discount), 0.0),
+                    func.count(Payment.id),
+                ).group_by(*key_columns),
+            ))
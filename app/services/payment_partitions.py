@@ -0,0 +1,106 @@
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+# Monthly partitions are named payments_y<YYYY>m<MM>; anything outside them lands here
+DEFAULT_PARTITION = "payments_default"
+
+# Serialises partition DDL across workers and the maintenance script
+_ADVISORY_LOCK_KEY = 0x7061796D  # "paym"
+
+
+def _add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"payments_y{month.year:04d}m{month.month:02d}"
+
+
+class PaymentPartitions:
+    """
+    Maintenance for the monthly range partitions of `payments` (opt-in, see
+    the payments_partitioning migration branch). Every method is a no-op
+    when the table is not partitioned.
+    """
+
+    @staticmethod
+    def is_partitioned(conn: Connection) -> bool:
+        return bool(conn.scalar(text(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('payments'))"
+        )))
+
+    @staticmethod
+    def monthly_partitions(conn: Connection) -> List[str]:
+        return list(conn.scalars(text("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass('payments') AND c.relname <> :default
+            ORDER BY c.relname
+        """), {"default": DEFAULT_PARTITION}))
+
+    @staticmethod
+    def create_partition(conn: Connection, month: date) -> bool:
+        """
+        Create the partition for `month` if it is missing. Rows for that
+        month already sitting in the default partition are moved into it.
+        """
+        name = partition_name(month)
+        if conn.scalar(text("SELECT to_regclass(:name)"), {"name": name}) is not None:
+            return False
+        start, end = _add_months(month, 0), _add_months(month, 1)
+        bounds = {"start": start, "end": end}
+        # Build it standalone, move stragglers out of the default partition,
+        # then attach: CREATE ... PARTITION OF would fail while they are there.
+        # The lock holds off inserts into the default partition until commit,
+        # and the rows are moved by one statement, so the ones copied are
+        # exactly the ones deleted
+        conn.execute(text(f"LOCK TABLE {DEFAULT_PARTITION} IN SHARE ROW EXCLUSIVE MODE"))
+        conn.execute(text(f"CREATE TABLE {name} (LIKE payments INCLUDING DEFAULTS)"))
+        conn.execute(text(f"""
+            WITH moved AS (
+                DELETE FROM {DEFAULT_PARTITION} WHERE date >= :start AND date < :end RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """), bounds)
+        conn.execute(text(
+            f"ALTER TABLE payments ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+        ))
+        return True
+
+    @staticmethod
+    def ensure_future(conn: Connection, months_ahead: int, today: Optional[date] = None) -> List[str]:
+        """Make sure this month and the next `months_ahead` months have partitions."""
+        if not PaymentPartitions.is_partitioned(conn):
+            return []
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        current = (today or date.today()).replace(day=1)
+        created = []
+        for i in range(months_ahead + 1):
+            month = _add_months(current, i)
+            if PaymentPartitions.create_partition(conn, month):
+                created.append(partition_name(month))
+        return created
+
+    @staticmethod
+    def detach_before(conn: Connection, cutoff: date) -> List[str]:
+        """
+        Detach every monthly partition that ends on or before `cutoff`.
+
+        Detached tables are left in place for archiving or DROP. The running
+        totals behind /payments/stats still include their rows until
+        app.scripts.rebuild_payment_aggregates is run.
+        """
+        if not PaymentPartitions.is_partitioned(conn):
+            return []
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": _ADVISORY_LOCK_KEY})
+        detached = []
+        for name in PaymentPartitions.monthly_partitions(conn):
+            month = date(int(name[10:14]), int(name[15:17]), 1)
+            if _add_months(month, 1) <= cutoff:
+                conn.execute(text(f"ALTER TABLE payments DETACH PARTITION {name}"))
+                detached.append(name)
+        return detached
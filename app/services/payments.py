@@ -1,20 +1,70 @@
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from datetime import date, datetime
 from typing import List, Optional
-from sqlalchemy import func
+from pydantic import ValidationError
+from sqlalchemy import Date, cast, func, insert, literal_column, select
+from sqlalchemy import Select
+from sqlalchemy.orm import aliased, joinedload
 
-from app.models.payments import Payment, PaymentMethod
+from app.core.pagination import Page, keyset_paginate, make_page
+from app.core.response_cache import invalidate
+from app.core.settings import settings
+from app.core.single_flight import single_flight
+from app.core.table_versions import mark_changed
+from app.models.payments import (
+    Payment, PaymentMethod, PaymentClientTotal, PaymentMethodTotal, PaymentDailyRollup
+)
 from app.models.auth import User, UserRole
+from app.schemas.payments import PaymentCreate, PaymentStatsResponse
+from app.services.payment_aggregates import PaymentAggregates, PaymentSnapshot, snapshot
+
+# Column order of the records handed to COPY in import_payments()
+_IMPORT_COLUMNS = ("date", "received_amount", "discount", "method", "description", "client_id", "received_by_id")
+# Ids per IN (...) lookup; each one is a bind parameter, and a statement takes at most 32767
+_LOOKUP_BATCH = 10_000
+
+def _select_payments():
+    """Payments with client/received_by names joined in, so responses need no extra queries."""
+    return select(Payment).options(
+        joinedload(Payment.client).load_only(User.name),
+        joinedload(Payment.received_by).load_only(User.name),
+    )
+
+def _payment_rows() -> Select:
+    """
+    Flat PaymentResponse rows, names joined in, for list endpoints and exports.
+    Plain Rows are much cheaper to build than Payment objects with two joined loads.
+    """
+    client = aliased(User)
+    received_by = aliased(User)
+    return (
+        select(
+            Payment.id,
+            Payment.date,
+            Payment.received_amount,
+            Payment.discount,
+            Payment.method,
+            Payment.description,
+            Payment.client_id,
+            client.name.label('client_name'),
+            Payment.received_by_id,
+            received_by.name.label('received_by_name'),
+            Payment.created_at,
+            Payment.updated_at
+        )
+        .join(client, Payment.client_id == client.id)
+        .join(received_by, Payment.received_by_id == received_by.id)
+    )
 
 class PaymentService:
     @staticmethod
-    def create_payment(db: Session, payment_data, current_user: User):
+    async def create_payment(db: AsyncSession, payment_data, current_user: User):
         # Validate client exists and has client role
-        client = db.query(User).filter(
+        client = await db.scalar(select(User).where(
             User.id == payment_data.client_id,
             User.role == UserRole.client
-        ).first()
+        ))
         if not client:
             raise HTTPException(
                 status_code=404, 
@@ -39,21 +89,136 @@ class PaymentService:
         )
         
         db.add(payment)
-        db.commit()
-        db.refresh(payment)
-        return payment
+        await PaymentAggregates.apply(db, added=[payment])
+        await db.commit()
+        await invalidate("payments", f"client:{payment.client_id}")
+        return await PaymentService._reload(db, payment.id)
 
     @staticmethod
-    def get_payments(db: Session, skip: int = 0, limit: int = 100):
-        return db.query(Payment).offset(skip).limit(limit).all()
+    async def import_payments(db: AsyncSession, rows: List[dict], current_user: User, dry_run: bool = False):
+        """
+        Validate and insert many payments at once.
+
+        Every row is validated like PaymentCreate and all client_ids are
+        checked in one query; the valid rows are then loaded with a single
+        COPY and added to the aggregates in the same transaction. Invalid
+        rows are reported back and skipped.
+        """
+        if current_user.role not in [UserRole.superadmin, UserRole.admin, UserRole.manager]:
+            raise HTTPException(
+                status_code=403,
+                detail="Only admin, superadmin or manager can receive payments"
+            )
+        if len(rows) > settings.PAYMENT_IMPORT_MAX_ROWS:
+            raise HTTPException(
+                status_code=413,
+                detail=f"At most {settings.PAYMENT_IMPORT_MAX_ROWS} rows per import"
+            )
+
+        errors, parsed = [], []
+        for row_number, row in enumerate(rows, start=1):
+            try:
+                parsed.append((row_number, PaymentCreate.model_validate(row)))
+            except ValidationError as e:
+                errors.append({
+                    "row": row_number,
+                    "errors": [f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()]
+                })
+
+        # Referenced clients checked together, not one query per row
+        client_ids = list({p.client_id for _, p in parsed})
+        known_clients = set()
+        for start in range(0, len(client_ids), _LOOKUP_BATCH):
+            known_clients.update(await db.scalars(select(User.id).where(
+                User.id.in_(client_ids[start:start + _LOOKUP_BATCH]),
+                User.role == UserRole.client
+            )))
+
+        valid = []
+        for row_number, p in parsed:
+            if p.client_id in known_clients:
+                valid.append(p)
+            else:
+                errors.append({"row": row_number, "errors": [f"client_id: client {p.client_id} not found"]})
+        errors.sort(key=lambda e: e["row"])
+
+        if valid and not dry_run:
+            payments = [
+                PaymentSnapshot(p.client_id, PaymentMethod(p.method.value), p.date, p.received_amount, p.discount or 0.0)
+                for p in valid
+            ]
+            try:
+                await PaymentService._copy_payments(db, valid, current_user.id)
+                await PaymentAggregates.apply(db, added=payments)
+                await db.commit()
+            except Exception as e:
+                await db.rollback()
+                # Rows were validated above, so this is a server-side failure; the
+                # database's message stays in the log
+                print(f"Payment import failed: {e!r}")
+                raise HTTPException(status_code=500, detail="Import failed, nothing was saved")
+            await invalidate("payments", *[f"client:{client_id}" for client_id in {p.client_id for p in valid}])
+
+        return {
+            "received": len(rows),
+            "imported": 0 if dry_run else len(valid),
+            "failed": len(errors),
+            "dry_run": dry_run,
+            "errors": errors
+        }
 
     @staticmethod
-    def get_payment_by_id(db: Session, payment_id: int):
-        return db.query(Payment).filter(Payment.id == payment_id).first()
+    async def _copy_payments(db: AsyncSession, payments: List[PaymentCreate], received_by_id: int):
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        if not hasattr(driver, "copy_records_to_table"):
+            # Not asyncpg: one executemany INSERT instead of COPY
+            await db.execute(insert(Payment), [
+                {**p.model_dump(), "method": PaymentMethod(p.method.value), "received_by_id": received_by_id}
+                for p in payments
+            ])
+            return
+        # Runs on the session's connection, inside the transaction the client
+        # lookup above already opened; the enum goes over as its label (the name)
+        mark_changed(db, "payments")
+        await driver.copy_records_to_table(
+            "payments",
+            columns=_IMPORT_COLUMNS,
+            records=[
+                (p.date, p.received_amount, p.discount, PaymentMethod(p.method.value).name,
+                 p.description, p.client_id, received_by_id)
+                for p in payments
+            ],
+        )
+
+    @staticmethod
+    async def _reload(db: AsyncSession, payment_id: int):
+        # Re-read after commit so server defaults and the names are loaded in one query
+        return await db.scalar(
+            _select_payments()
+            .where(Payment.id == payment_id)
+            .execution_options(populate_existing=True)
+        )
+
+    @staticmethod
+    async def get_payments(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        # Newest first, keyed on (date, id)
+        stmt = keyset_paginate(
+            _payment_rows(), [Payment.date, Payment.id], cursor, skip, limit, descending=True
+        )
+        result = await db.execute(stmt)
+        return make_page(result.all(), limit, ["date", "id"])
 
     @staticmethod
-    def update_payment(db: Session, payment_id: int, payment_data, current_user: User):
-        payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    async def get_payment_by_id(db: AsyncSession, payment_id: int):
+        return await db.scalar(_select_payments().where(Payment.id == payment_id))
+
+    @staticmethod
+    async def update_payment(db: AsyncSession, payment_id: int, payment_data, current_user: User):
+        # Locked until commit: concurrent edits of this payment queue here, so each
+        # sees the previous one's values and the totals get consistent deltas
+        payment = await db.scalar(select(Payment).where(Payment.id == payment_id).with_for_update())
         if not payment:
             raise HTTPException(status_code=404, detail="Payment not found")
         
@@ -64,17 +229,20 @@ class PaymentService:
                 detail="Only admin or superadmin can update payments"
             )
 
+        before = snapshot(payment)
         update_data = payment_data.dict(exclude_unset=True)
         for field, value in update_data.items():
             setattr(payment, field, value)
         
-        db.commit()
-        db.refresh(payment)
-        return payment
+        await PaymentAggregates.apply(db, added=[payment], removed=[before])
+        await db.commit()
+        # The payment may have moved to another client
+        await invalidate("payments", f"client:{before.client_id}", f"client:{payment.client_id}")
+        return await PaymentService._reload(db, payment.id)
 
     @staticmethod
-    def delete_payment(db: Session, payment_id: int, current_user: User):
-        payment = db.query(Payment).filter(Payment.id == payment_id).first()
+    async def delete_payment(db: AsyncSession, payment_id: int, current_user: User):
+        payment = await db.scalar(select(Payment).where(Payment.id == payment_id).with_for_update())
         if not payment:
             raise HTTPException(status_code=404, detail="Payment not found")
         
@@ -85,61 +253,80 @@ class PaymentService:
                 detail="Only admin or superadmin can delete payments"
             )
         
-        db.delete(payment)
-        db.commit()
+        client_id = payment.client_id
+        await PaymentAggregates.apply(db, removed=[payment])
+        await db.delete(payment)
+        await db.commit()
+        await invalidate("payments", f"client:{client_id}")
         return {"message": "Payment deleted successfully"}
 
     @staticmethod
-    def get_payments_by_client(db: Session, client_id: int):
+    async def get_payments_by_client(db: AsyncSession, client_id: int):
         # Validate client exists
-        client = db.query(User).filter(
+        client = await db.scalar(select(User).where(
             User.id == client_id,
             User.role == UserRole.client
-        ).first()
+        ))
         if not client:
             raise HTTPException(status_code=404, detail="Client not found")
         
-        return db.query(Payment).filter(Payment.client_id == client_id).all()
+        result = await db.execute(_payment_rows().where(Payment.client_id == client_id))
+        return result.all()
+
+    @staticmethod
+    def export_query(
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        client_id: Optional[int] = None,
+        method: Optional[PaymentMethod] = None
+    ) -> Select:
+        """Flat payment rows with client/receiver names, oldest first, for exports."""
+        stmt = _payment_rows().order_by(Payment.date, Payment.id)
+        if start_date is not None:
+            stmt = stmt.where(Payment.date >= start_date)
+        if end_date is not None:
+            stmt = stmt.where(Payment.date <= end_date)
+        if client_id is not None:
+            stmt = stmt.where(Payment.client_id == client_id)
+        if method is not None:
+            stmt = stmt.where(Payment.method == method)
+        return stmt
 
     @staticmethod
-    def get_payments_by_date_range(db: Session, start_date: date, end_date: date):
-        return db.query(Payment).filter(
+    async def get_payments_by_date_range(db: AsyncSession, start_date: date, end_date: date):
+        result = await db.execute(_payment_rows().where(
             Payment.date >= start_date,
             Payment.date <= end_date
-        ).all()
+        ))
+        return result.all()
 
     @staticmethod
-    def get_payment_stats(db: Session):
-        # Overall stats
-        overall_stats = db.query(
-            func.sum(Payment.received_amount).label('total_received'),
-            func.sum(Payment.discount).label('total_discount'),
-            func.count(Payment.id).label('payment_count')
-        ).first()
-
+    @single_flight("payment_stats", model=PaymentStatsResponse)
+    async def get_payment_stats(db: AsyncSession):
+        # Served from the running totals (see PaymentAggregates): O(#clients), not O(#payments)
         # Stats by client
-        client_stats = db.query(
-            Payment.client_id,
+        client_stats = (await db.execute(select(
+            PaymentClientTotal.client_id,
             User.name.label('client_name'),
-            func.sum(Payment.received_amount).label('total_received'),
-            func.sum(Payment.discount).label('total_discount'),
-            func.count(Payment.id).label('payment_count')
-        ).join(User, Payment.client_id == User.id)\
-         .group_by(Payment.client_id, User.name)\
-         .all()
+            PaymentClientTotal.total_received,
+            PaymentClientTotal.total_discount,
+            PaymentClientTotal.payment_count
+        ).join(User, PaymentClientTotal.client_id == User.id)
+         .where(PaymentClientTotal.payment_count > 0))).all()
 
         # Stats by payment method
-        method_stats = db.query(
-            Payment.method,
-            func.sum(Payment.received_amount).label('total_received'),
-            func.count(Payment.id).label('payment_count')
-        ).group_by(Payment.method).all()
+        method_stats = (await db.execute(select(
+            PaymentMethodTotal.method,
+            PaymentMethodTotal.total_received,
+            PaymentMethodTotal.payment_count
+        ).where(PaymentMethodTotal.payment_count > 0))).all()
 
         # Format response
+        # Overall stats are the sum of the per-client totals
         overall_summary = {
-            "total_received": float(overall_stats.total_received or 0),
-            "total_discount": float(overall_stats.total_discount or 0),
-            "payment_count": overall_stats.payment_count or 0
+            "total_received": float(sum(stat.total_received or 0 for stat in client_stats)),
+            "total_discount": float(sum(stat.total_discount or 0 for stat in client_stats)),
+            "payment_count": sum(stat.payment_count or 0 for stat in client_stats)
         }
 
         client_summaries = []
@@ -163,4 +350,46 @@ class PaymentService:
             "overall": overall_summary,
             "by_client": client_summaries,
             "by_method": method_summary
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    async def get_payment_rollup(db: AsyncSession, start_date: date, end_date: date, granularity: str, group_by: str):
+        """
+        Received/discount totals and counts per day, week or month, optionally
+        per client or per method. Reads the daily rollup table, so the cost is
+        bounded by days x clients x methods in the range, not by payments.
+        """
+        # Inlined rather than bound so GROUP BY matches the selected expression;
+        # granularity is one of the RollupGranularity values
+        unit = literal_column(f"'{granularity}'")
+        period = cast(func.date_trunc(unit, PaymentDailyRollup.day), Date).label('period_start')
+        keys = [period]
+        if group_by == "client":
+            keys += [PaymentDailyRollup.client_id, User.name.label('client_name')]
+        elif group_by == "method":
+            keys.append(PaymentDailyRollup.method)
+
+        stmt = select(
+            *keys,
+            func.sum(PaymentDailyRollup.total_received).label('total_received'),
+            func.sum(PaymentDailyRollup.total_discount).label('total_discount'),
+            func.sum(PaymentDailyRollup.payment_count).label('payment_count')
+        ).where(
+            PaymentDailyRollup.day >= start_date,
+            PaymentDailyRollup.day <= end_date
+        ).group_by(*keys).having(
+            func.sum(PaymentDailyRollup.payment_count) > 0
+        ).order_by(*keys)
+        if group_by == "client":
+            stmt = stmt.join(User, PaymentDailyRollup.client_id == User.id)
+
+        rows = (await db.execute(stmt)).all()
+        return [
+            {
+                **row._mapping,
+                "total_received": float(row.total_received or 0),
+                "total_discount": float(row.total_discount or 0),
+                "payment_count": int(row.payment_count or 0)
+            }
+            for row in rows
+        ]
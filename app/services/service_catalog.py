@@ -0,0 +1,122 @@
+import asyncio
+import bisect
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import redis
+from sqlalchemy import select
+
+from app.core.config import AsyncSessionLocal
+from app.core.pagination import Page, decode_cursor, make_page
+from app.core.redis_client import async_redis_client, subscribe
+from app.core.response_cache import invalidate as invalidate_responses
+from app.core.settings import settings
+from app.core.table_versions import TableVersion, get_versions
+from app.models.services import Service
+from app.schemas.services import ServiceResponse
+
+# Published after every committed change to `services`; each worker drops its copy
+SERVICE_CATALOG_CHANNEL = "catalog:services"
+
+
+class ServiceCatalog:
+    """
+    Read-through, per-worker copy of the services table, by id.
+
+    Loaded from the primary with one query on first use (a replica could
+    return a copy from before the change that invalidated the last one),
+    then served from a dictionary until a change is published on
+    SERVICE_CATALOG_CHANNEL (or, as a backstop for a missed message, until
+    SERVICE_CATALOG_TTL_SECONDS pass). Entries are ServiceResponse models,
+    so they can be returned as they are.
+
+    Each copy keeps the `services` table version read just before it was
+    loaded, which is what versions() reports for the ETags: until this
+    worker has reloaded, the ETag stays the one that went with its data.
+    """
+
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        # (services by id, version read before loading them); one attribute
+        # so that a reader always gets a matching pair
+        self._copy: Optional[Tuple[Dict[int, ServiceResponse], Optional[TableVersion]]] = None
+        self._loaded_at = 0.0
+        # Bumped by invalidate() (possibly from the pub/sub thread); a load
+        # that raced with an invalidation is not installed
+        self._generation = 0
+        self._generation_lock = threading.Lock()
+        self._load_lock = asyncio.Lock()
+
+    def invalidate(self, *_):
+        with self._generation_lock:
+            self._generation += 1
+            self._copy = None
+
+    def _fresh(self):
+        # One read: the pub/sub thread may set _copy to None at any point
+        copy = self._copy
+        if copy is not None and time.monotonic() - self._loaded_at < self.ttl:
+            return copy
+        return None
+
+    async def _ensure(self) -> Tuple[Dict[int, ServiceResponse], Optional[TableVersion]]:
+        copy = self._fresh()
+        if copy is not None:
+            return copy
+        async with self._load_lock:
+            copy = self._fresh()
+            if copy is not None:  # another request loaded it while we waited
+                return copy
+            generation = self._generation
+            # Read before the query: versions are bumped after commit, so the
+            # rows loaded are at least as new as this version
+            try:
+                version = (await get_versions(["services"]))["services"]
+            except redis.RedisError:
+                version = None  # served without an ETag until the next load
+            async with AsyncSessionLocal() as db:
+                result = await db.scalars(select(Service).order_by(Service.id))
+                copy = ({s.id: ServiceResponse.model_validate(s, from_attributes=True) for s in result}, version)
+            with self._generation_lock:
+                if generation == self._generation:
+                    self._loaded_at = time.monotonic()
+                    self._copy = copy
+            return copy
+
+    async def versions(self, tables: List[str]) -> Optional[Dict[str, TableVersion]]:
+        """conditional_get() versions for responses built from the catalog."""
+        _, version = await self._ensure()
+        return None if version is None else {"services": version}
+
+    async def get(self, service_id: int) -> Optional[ServiceResponse]:
+        by_id, _ = await self._ensure()
+        return by_id.get(service_id)
+
+    async def page(self, skip: int, limit: int, cursor: Optional[str]) -> Page:
+        """Same paging as keyset_paginate() on Service.id, over the cached ids."""
+        by_id, _ = await self._ensure()
+        ids = sorted(by_id)
+        if cursor:
+            (last_seen,) = decode_cursor(cursor, [Service.id])
+            start = bisect.bisect_right(ids, last_seen)
+        else:
+            start = skip
+        return make_page([by_id[i] for i in ids[start:start + limit]], limit, ["id"])
+
+    async def changed(self):
+        """
+        Call after committing a change to services: drop this copy, tell the
+        other workers, and expire cached responses that show service names.
+        """
+        self.invalidate()
+        await invalidate_responses("services")
+        try:
+            await async_redis_client.publish(SERVICE_CATALOG_CHANNEL, "changed")
+        except redis.RedisError as e:
+            # Other workers catch up when their TTL runs out
+            print(f"Service catalog invalidation publish failed: {e}")
+
+
+service_catalog = ServiceCatalog(ttl=settings.SERVICE_CATALOG_TTL_SECONDS)
+subscribe(SERVICE_CATALOG_CHANNEL, service_catalog.invalidate)
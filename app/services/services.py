@@ -1,14 +1,24 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import Select, case, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi import HTTPException, status
 from datetime import date, datetime
-from calendar import monthrange
+from typing import List, Optional
+from app.core.pagination import Page, keyset_paginate, make_page
+from app.core.response_cache import invalidate
+from app.core.responses import response_columns
+from app.core.single_flight import single_flight
+from app.schemas.services import InvoicePreviewResponse, ServiceAssignmentResponse
 from app.models.services import Service, ServiceAssignment
-from app.models.auth import User
+from app.services.service_catalog import service_catalog
+from app.services.billing import (
+    preview_rows_query, compute_invoice_preview, billing_run_query, iter_client_previews
+)
+from app.models.auth import User, UserRole
 
 class ServiceService:
     @staticmethod
-    def create_service(db: Session, service_data, current_user: User):
-        existing_service = db.query(Service).filter(Service.name == service_data.name).first()
+    async def create_service(db: AsyncSession, service_data, current_user: User):
+        existing_service = await db.scalar(select(Service).where(Service.name == service_data.name))
         if existing_service:
             raise HTTPException(status_code=400, detail="Service name already exists")
         
@@ -18,29 +28,30 @@ class ServiceService:
             active=True
         )
         db.add(service)
-        db.commit()
-        db.refresh(service)
+        await db.commit()
+        await db.refresh(service)
+        await service_catalog.changed()
         return service
 
     @staticmethod
-    def get_services(db: Session, skip: int = 0, limit: int = 100):
-        return db.query(Service).offset(skip).limit(limit).all()
+    async def get_services(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        return await service_catalog.page(skip, limit, cursor)
 
     @staticmethod
-    def get_service_by_id(db: Session, service_id: int):
-        return db.query(Service).filter(Service.id == service_id).first()
+    async def get_service_by_id(db: AsyncSession, service_id: int):
+        return await service_catalog.get(service_id)
 
     @staticmethod
-    def update_service(db: Session, service_id: int, service_data, current_user: User):
-        service = db.query(Service).filter(Service.id == service_id).first()
+    async def update_service(db: AsyncSession, service_id: int, service_data, current_user: User):
+        service = await db.scalar(select(Service).where(Service.id == service_id))
         if not service:
             raise HTTPException(status_code=404, detail="Service not found")
         
         if service_data.name is not None:
-            existing_service = db.query(Service).filter(
+            existing_service = await db.scalar(select(Service).where(
                 Service.name == service_data.name, 
                 Service.id != service_id
-            ).first()
+            ))
             if existing_service:
                 raise HTTPException(status_code=400, detail="Service name already exists")
             service.name = service_data.name
@@ -48,34 +59,37 @@ class ServiceService:
         if service_data.active is not None:
             service.active = service_data.active
         
-        db.commit()
-        db.refresh(service)
+        await db.commit()
+        await db.refresh(service)
+        await service_catalog.changed()
         return service
 
     @staticmethod
-    def delete_service(db: Session, service_id: int, current_user: User):
-        service = db.query(Service).filter(Service.id == service_id).first()
+    async def delete_service(db: AsyncSession, service_id: int, current_user: User):
+        service = await db.scalar(select(Service).where(Service.id == service_id))
         if not service:
             raise HTTPException(status_code=404, detail="Service not found")
         
-        db.delete(service)
-        db.commit()
+        await db.delete(service)
+        await db.commit()
+        await service_catalog.changed()
         return {"message": "Service deleted successfully"}
     
     @staticmethod
-    def update_service_active(db: Session, service_id: int, active: bool, current_user: User):
-        service = db.query(Service).filter(Service.id == service_id).first()
+    async def update_service_active(db: AsyncSession, service_id: int, active: bool, current_user: User):
+        service = await db.scalar(select(Service).where(Service.id == service_id))
         if not service:
             raise HTTPException(status_code=404, detail="Service not found")
         
         service.active = active
-        db.commit()
-        db.refresh(service)
+        await db.commit()
+        await db.refresh(service)
+        await service_catalog.changed()
         return service
 
 class ServiceAssignmentService:
     @staticmethod
-    def create_service_assignment(db: Session, assignment_data, current_user: User):
+    async def create_service_assignment(db: AsyncSession, assignment_data, current_user: User):
         assignment = ServiceAssignment(
             client_id=assignment_data.client_id,
             service_id=assignment_data.service_id,
@@ -89,21 +103,93 @@ class ServiceAssignmentService:
         )
         
         db.add(assignment)
-        db.commit()
-        db.refresh(assignment)
+        await db.commit()
+        await invalidate(f"assignments:client:{assignment.client_id}")
+        await db.refresh(assignment)
         return assignment
 
     @staticmethod
-    def get_service_assignments(db: Session, skip: int = 0, limit: int = 100):
-        return db.query(ServiceAssignment).offset(skip).limit(limit).all()
+    async def create_service_assignments(db: AsyncSession, assignments: List, current_user: User):
+        """Insert many assignments with one multi-row INSERT ... RETURNING."""
+        # Check every referenced client and service up front, one query each
+        client_ids = {a.client_id for a in assignments}
+        service_ids = {a.service_id for a in assignments}
+        known_clients = set(await db.scalars(select(User.id).where(
+            User.id.in_(client_ids), User.role == UserRole.client
+        )))
+        known_services = set(await db.scalars(select(Service.id).where(Service.id.in_(service_ids))))
+        missing_clients = sorted(client_ids - known_clients)
+        missing_services = sorted(service_ids - known_services)
+        if missing_clients or missing_services:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Clients not found: {missing_clients}; services not found: {missing_services}"
+            )
+
+        result = await db.scalars(
+            insert(ServiceAssignment).returning(ServiceAssignment, sort_by_parameter_order=True),
+            [
+                {**a.model_dump(), "status": True, "created_by": current_user.username}
+                for a in assignments
+            ]
+        )
+        created = result.all()
+        await db.commit()
+        await invalidate(*[f"assignments:client:{client_id}" for client_id in client_ids])
+        return created
+
+    @staticmethod
+    async def get_service_assignments(db: AsyncSession, skip: int = 0, limit: int = 100, cursor: Optional[str] = None) -> Page:
+        stmt = keyset_paginate(
+            select(*response_columns(ServiceAssignment, ServiceAssignmentResponse)),
+            [ServiceAssignment.id], cursor, skip, limit
+        )
+        result = await db.execute(stmt)
+        return make_page(result.all(), limit, ["id"])
 
     @staticmethod
-    def get_service_assignment_by_id(db: Session, assignment_id: int):
-        return db.query(ServiceAssignment).filter(ServiceAssignment.id == assignment_id).first()
+    def export_query(
+        client_id: Optional[int] = None,
+        service_id: Optional[int] = None,
+        status: Optional[bool] = None
+    ) -> Select:
+        """Flat assignment rows with client and service names, in id order, for exports."""
+        stmt = (
+            select(
+                ServiceAssignment.id,
+                ServiceAssignment.client_id,
+                User.name.label("client_name"),
+                ServiceAssignment.service_id,
+                Service.name.label("service_name"),
+                ServiceAssignment.description,
+                ServiceAssignment.link_capacity,
+                ServiceAssignment.rate,
+                ServiceAssignment.service_start_month,
+                ServiceAssignment.billing_start_date,
+                ServiceAssignment.service_stop_date,
+                ServiceAssignment.status,
+                ServiceAssignment.created_by,
+                ServiceAssignment.created_at
+            )
+            .join(User, ServiceAssignment.client_id == User.id)
+            .join(Service, ServiceAssignment.service_id == Service.id)
+            .order_by(ServiceAssignment.id)
+        )
+        if client_id is not None:
+            stmt = stmt.where(ServiceAssignment.client_id == client_id)
+        if service_id is not None:
+            stmt = stmt.where(ServiceAssignment.service_id == service_id)
+        if status is not None:
+            stmt = stmt.where(ServiceAssignment.status.is_(status))
+        return stmt
+
+    @staticmethod
+    async def get_service_assignment_by_id(db: AsyncSession, assignment_id: int):
+        return await db.scalar(select(ServiceAssignment).where(ServiceAssignment.id == assignment_id))
 
     @staticmethod
-    def update_service_assignment_status(db: Session, assignment_id: int, status: bool, current_user: User):
-        assignment = db.query(ServiceAssignment).filter(ServiceAssignment.id == assignment_id).first()
+    async def update_service_assignment_status(db: AsyncSession, assignment_id: int, status: bool, current_user: User):
+        assignment = await db.scalar(select(ServiceAssignment).where(ServiceAssignment.id == assignment_id))
         if not assignment:
             raise HTTPException(status_code=404, detail="Service assignment not found")
         
@@ -113,89 +199,69 @@ class ServiceAssignmentService:
         if status == False and assignment.service_stop_date is None:
             assignment.service_stop_date = datetime.now().date()
         
-        db.commit()
-        db.refresh(assignment)
+        await db.commit()
+        await invalidate(f"assignments:client:{assignment.client_id}")
+        await db.refresh(assignment)
         return assignment
     
     @staticmethod
-    def get_invoice_preview_for_client(db: Session, client_id: int, months: list[date]):
+    async def update_service_assignments_status(db: AsyncSession, data, current_user: User):
         """
-        Returns all active assignments for the given client for the selected months,
-        with prorated rate computation based on billing_start_date.
+        Set `status` on every assignment matching the filters in one
+        UPDATE ... RETURNING. Assignments being stopped get a
+        service_stop_date unless they already have one, as in
+        update_service_assignment_status(). Returns the rows that changed.
         """
-        from datetime import date
+        filters = [ServiceAssignment.status.isnot(data.status)]
+        if data.client_id is not None:
+            filters.append(ServiceAssignment.client_id == data.client_id)
+        if data.service_id is not None:
+            filters.append(ServiceAssignment.service_id == data.service_id)
+        if data.ids:
+            filters.append(ServiceAssignment.id.in_(data.ids))
 
-        assignments = (
-            db.query(ServiceAssignment)
-            .filter(ServiceAssignment.client_id == client_id)
-            .all()
+        values = {"status": data.status}
+        if data.status is False:
+            values["service_stop_date"] = case(
+                (ServiceAssignment.service_stop_date.is_(None), data.service_stop_date or datetime.now().date()),
+                else_=ServiceAssignment.service_stop_date
+            )
+
+        result = await db.scalars(
+            update(ServiceAssignment).where(*filters).values(**values).returning(ServiceAssignment),
+            execution_options={"synchronize_session": False}
         )
+        updated = result.all()
+        await db.commit()
+        await invalidate(*[f"assignments:client:{client_id}" for client_id in {a.client_id for a in updated}])
+        return updated
 
-        result = []
-
-        for m in months:
-            year, month = m.year, m.month
-            days_in_month = monthrange(year, month)[1]
-            month_start = date(year, month, 1)
-            month_end = date(year, month, days_in_month)
-
-            services = []
-
-            for a in assignments:
-                # Skip inactive or out-of-range assignments
-                if not a.status:
-                    continue
-                if a.service_start_month > month_start:
-                    continue
-                if a.service_stop_date and a.service_stop_date < month_start:
-                    continue
-
-                if a.billing_start_date > month_end or a.billing_start_date < month_start:
-                    continue
-
-                # Determine billing start day for this assignment
-                billing_day = a.billing_start_date.day
-
-                # Compute prorated days
-                if billing_day <= 1:
-                    prorated_days = days_in_month
-                elif billing_day > days_in_month:
-                    prorated_days = 0
-                else:
-                    prorated_days = days_in_month - (billing_day - 1)
-
-                # Compute prorated amount
-                prorated_amount = 0.0
-                if a.rate and prorated_days > 0:
-                    prorated_amount = float(a.rate * prorated_days / days_in_month)
-
-                # Compose result item
-                services.append({
-                    "assignment_id": a.id,
-                    "service_id": a.service_id,
-                    "service_name": a.service.name if a.service else "",
-                    "description": a.description,
-                    "link_capacity": a.link_capacity,
-                    "rate": a.rate,
-                    "billing_start_date": a.billing_start_date,
-                    "service_start_month": a.service_start_month,
-                    "service_stop_date": a.service_stop_date,
-                    "status": a.status,
-                    "prorated_days": prorated_days,
-                    "prorated_amount": round(prorated_amount, 2)
-                })
-
-            # Format response month
-            month_label = m.strftime("%B %Y")
-
-            result.append({
-                "month": month_start,
-                "label": month_label,
-                "days_in_month": days_in_month,
-                "services": services
-            })
+    @staticmethod
+    @single_flight("invoice_preview", key="{client_id}:{months}", model=InvoicePreviewResponse)
+    async def get_invoice_preview_for_client(db: AsyncSession, client_id: int, months: list[date]):
+        """
+        Returns all active assignments for the given client for the selected months,
+        with prorated rate computation based on billing_start_date.
+        """
+        rows = []
+        if months:
+            rows = (await db.execute(preview_rows_query(months, client_ids=[client_id]))).all()
 
         return {
             "client_id": client_id,
-            "months": result
-        }
\ No newline at end of file
+            "months": compute_invoice_preview(rows, months)
+        }
+
+    @staticmethod
+    async def billing_run(db: AsyncSession, months: list[date], client_ids: Optional[list[int]] = None):
+        """
+        Previews for every active client (or `client_ids`) from a single
+        streamed query. Yields one dict per client that has billable
+        assignments in `months`.
+        """
+        if not months:
+            return
+        stmt = billing_run_query(months, client_ids).execution_options(yield_per=1000)
+        result = await db.stream(stmt)
+        async for preview in iter_client_previews(result, months):
+            yield preview
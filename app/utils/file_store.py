@@ -0,0 +1,283 @@
+import abc
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import uuid
+from urllib.parse import quote
+
+from fastapi import HTTPException, UploadFile
+from fastapi.responses import FileResponse, RedirectResponse, Response
+
+from app.core.settings import settings
+from app.utils.uploads import StoredUpload, save_upload
+
+# Incoming files are staged here, on the same filesystem as the store
+STAGING_DIR = ".incoming"
+
+
+def _content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def _sha256_of(path: str):
+    digest, size = hashlib.sha256(), 0
+    with open(path, "rb") as f:
+        while chunk := f.read(settings.UPLOAD_CHUNK_SIZE):
+            digest.update(chunk)
+            size += len(chunk)
+    return digest.hexdigest(), size
+
+
+def _unlink_missing_ok(path: str):
+    try:
+        os.unlink(path)
+    except FileNotFoundError:
+        pass
+
+
+class ContentAddressedStore(abc.ABC):
+    """
+    Files named by the SHA-256 of their content, sharded two levels deep:
+    ab/cd/abcd...<suffix>.
+
+    Identical content lands on the same key, so it is stored once however
+    many records point at it, and no write can clobber a different file.
+    Shards keep every directory (or listing prefix) small however many
+    files there are. Subclasses decide where the bytes live and how a
+    download is handed off.
+    """
+
+    def __init__(self, suffix: str = "", media_type: str = "application/octet-stream"):
+        self.suffix = suffix
+        self.media_type = media_type
+
+    def key(self, sha256: str) -> str:
+        return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{self.suffix}"
+
+    @abc.abstractmethod
+    async def save(self, file: UploadFile) -> StoredUpload:
+        """Stream an upload into the store (see save_upload); returns its location, hash and size."""
+
+    @abc.abstractmethod
+    def add_file(self, source: str) -> StoredUpload:
+        """Put an existing local file into the store (synchronous, for scripts); `source` is left in place."""
+
+    @abc.abstractmethod
+    async def download_response(self, sha256: str, filename: str) -> Response:
+        """A response that gets the stored file to the client as `filename`."""
+
+
+class LocalStore(ContentAddressedStore):
+    """
+    Files under a local directory, <root>/ab/cd/<sha256><suffix>.
+
+    With `accel_redirect_prefix` downloads are answered with an empty
+    response carrying X-Accel-Redirect, and nginx sends the file itself
+    from an internal location such as:
+
+        location /protected/invoices/ {
+            internal;
+            alias /app/uploads/invoices/;
+        }
+
+    Without it the worker streams the file (FileResponse).
+    """
+
+    def __init__(self, root: str, suffix: str = "", media_type: str = "application/octet-stream",
+                 accel_redirect_prefix: str = ""):
+        super().__init__(suffix, media_type)
+        self.root = root
+        self.accel_redirect_prefix = accel_redirect_prefix.rstrip("/")
+
+    def path(self, sha256: str) -> str:
+        return os.path.join(self.root, *self.key(sha256).split("/"))
+
+    def _place(self, staged: str, sha256: str) -> str:
+        """Move a fully written staged file to its content path, or drop it if that content is already stored."""
+        path = self.path(sha256)
+        if os.path.exists(path):
+            os.unlink(staged)
+            return path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Two identical uploads racing here replace each other with the same bytes
+        os.replace(staged, path)
+        return path
+
+    async def save(self, file: UploadFile) -> StoredUpload:
+        staged = os.path.join(self.root, STAGING_DIR, f"{uuid.uuid4().hex}.part")
+        upload = await save_upload(file, staged)
+        try:
+            path = await asyncio.to_thread(self._place, staged, upload.sha256)
+        except BaseException:
+            await asyncio.to_thread(_unlink_missing_ok, staged)
+            raise
+        return StoredUpload(path, upload.sha256, upload.size)
+
+    def add_file(self, source: str) -> StoredUpload:
+        # Hard-linked in where possible, otherwise copied
+        sha256, size = _sha256_of(source)
+        path = self.path(sha256)
+        if not os.path.exists(path):
+            staged = os.path.join(self.root, STAGING_DIR, f"{uuid.uuid4().hex}.part")
+            os.makedirs(os.path.dirname(staged), exist_ok=True)
+            try:
+                os.link(source, staged)
+            except OSError:  # another filesystem, or no hard links
+                shutil.copyfile(source, staged)
+            path = self._place(staged, sha256)
+        return StoredUpload(path, sha256, size)
+
+    async def download_response(self, sha256: str, filename: str) -> Response:
+        if self.accel_redirect_prefix:
+            # nginx answers 404 itself if the file is missing
+            return Response(media_type=self.media_type, headers={
+                "X-Accel-Redirect": f"{self.accel_redirect_prefix}/{self.key(sha256)}",
+                "Content-Disposition": _content_disposition(filename),
+            })
+        path = self.path(sha256)
+        if not await asyncio.to_thread(os.path.exists, path):
+            raise HTTPException(status_code=404, detail="File not found")
+        return FileResponse(path=path, filename=filename, media_type=self.media_type)
+
+
+class S3Store(ContentAddressedStore):
+    """
+    Objects in an S3-compatible bucket (AWS S3, MinIO, ...), keyed
+    <prefix>ab/cd/<sha256><suffix>.
+
+    Uploads are staged in a local temporary file, then sent with
+    upload_file (multipart for large files) unless the object already
+    exists. Downloads redirect to a presigned GET URL valid for
+    `url_seconds`, so the bytes never pass through the app. Needs boto3.
+    """
+
+    def __init__(
+        self,
+        bucket: str,
+        prefix: str = "",
+        suffix: str = "",
+        media_type: str = "application/octet-stream",
+        endpoint_url: str = "",
+        region: str = "",
+        access_key_id: str = "",
+        secret_access_key: str = "",
+        url_seconds: int = 300,
+    ):
+        super().__init__(suffix, media_type)
+        self.bucket = bucket
+        self.prefix = prefix
+        self.endpoint_url = endpoint_url
+        self.region = region
+        self.access_key_id = access_key_id
+        self.secret_access_key = secret_access_key
+        self.url_seconds = url_seconds
+        self._client = None
+        # First use can come from several to_thread() workers at once, and
+        # building a boto3 client is not thread-safe
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is not None:
+            return self._client
+        with self._client_lock:
+            if self._client is None:
+                try:
+                    import boto3
+                    from botocore.config import Config
+                except ImportError:
+                    raise HTTPException(status_code=501, detail="S3 invoice storage needs boto3 installed")
+                self._client = boto3.client(
+                    "s3",
+                    endpoint_url=self.endpoint_url or None,
+                    region_name=self.region or None,
+                    # Empty credentials: boto3's usual chain (env, profile, instance role)
+                    aws_access_key_id=self.access_key_id or None,
+                    aws_secret_access_key=self.secret_access_key or None,
+                    # Path-style addressing works with MinIO and other self-hosted endpoints
+                    config=Config(signature_version="s3v4", s3={"addressing_style": "path"} if self.endpoint_url else {}),
+                )
+        return self._client
+
+    def object_key(self, sha256: str) -> str:
+        return f"{self.prefix}{self.key(sha256)}"
+
+    def _exists(self, key: str) -> bool:
+        from botocore.exceptions import ClientError
+
+        try:
+            self.client.head_object(Bucket=self.bucket, Key=key)
+            return True
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return False
+            raise
+
+    def _put(self, source: str, sha256: str) -> str:
+        key = self.object_key(sha256)
+        if not self._exists(key):
+            self.client.upload_file(source, self.bucket, key, ExtraArgs={"ContentType": self.media_type})
+        return f"s3://{self.bucket}/{key}"
+
+    async def save(self, file: UploadFile) -> StoredUpload:
+        staged = os.path.join(tempfile.gettempdir(), f"upload-{uuid.uuid4().hex}.part")
+        upload = await save_upload(file, staged)
+        try:
+            location = await asyncio.to_thread(self._put, staged, upload.sha256)
+        finally:
+            await asyncio.to_thread(_unlink_missing_ok, staged)
+        return StoredUpload(location, upload.sha256, upload.size)
+
+    def add_file(self, source: str) -> StoredUpload:
+        sha256, size = _sha256_of(source)
+        return StoredUpload(self._put(source, sha256), sha256, size)
+
+    def _presign(self, sha256: str, filename: str) -> str:
+        # Signed locally, no request to S3
+        return self.client.generate_presigned_url(
+            "get_object",
+            Params={
+                "Bucket": self.bucket,
+                "Key": self.object_key(sha256),
+                "ResponseContentDisposition": _content_disposition(filename),
+                "ResponseContentType": self.media_type,
+            },
+            ExpiresIn=self.url_seconds,
+        )
+
+    async def download_response(self, sha256: str, filename: str) -> Response:
+        # In a thread: the first call builds the client (credential lookup may
+        # hit the instance metadata service), and signing is CPU work
+        url = await asyncio.to_thread(self._presign, sha256, filename)
+        return RedirectResponse(url, status_code=307)
+
+
+def invoice_store_for(backend: str) -> ContentAddressedStore:
+    """The invoice store for an INVOICE_STORAGE_BACKEND value, configured from settings."""
+    if backend == "s3":
+        return S3Store(
+            bucket=settings.INVOICE_S3_BUCKET,
+            prefix=settings.INVOICE_S3_PREFIX,
+            suffix=".pdf",
+            media_type="application/pdf",
+            endpoint_url=settings.INVOICE_S3_ENDPOINT_URL,
+            region=settings.INVOICE_S3_REGION,
+            access_key_id=settings.INVOICE_S3_ACCESS_KEY_ID,
+            secret_access_key=settings.INVOICE_S3_SECRET_ACCESS_KEY,
+            url_seconds=settings.INVOICE_DOWNLOAD_URL_SECONDS,
+        )
+    return LocalStore(
+        settings.INVOICE_STORE_DIR,
+        suffix=".pdf",
+        media_type="application/pdf",
+        accel_redirect_prefix=settings.INVOICE_ACCEL_REDIRECT_PREFIX,
+    )
+
+
+invoice_store = invoice_store_for(settings.INVOICE_STORAGE_BACKEND)
@@ -0,0 +1,35 @@
+import csv
+import io
+import json
+from typing import List
+
+from fastapi import HTTPException
+
+
+def read_rows(content: bytes, filename: str = "", content_type: str = "") -> List[dict]:
+    """
+    Rows of an uploaded CSV (header line + rows) or JSON (array of objects) file.
+
+    The format follows the content type, falling back to the file extension.
+    Empty CSV cells become None.
+    """
+    is_json = "json" in (content_type or "") or (filename or "").lower().endswith(".json")
+    try:
+        text = content.decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded")
+
+    if is_json:
+        try:
+            rows = json.loads(text)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON: {str(e)}")
+        if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+            raise HTTPException(status_code=400, detail="JSON must be an array of objects")
+        return rows
+
+    reader = csv.DictReader(io.StringIO(text))
+    return [
+        {key.strip(): (value if value != "" else None) for key, value in row.items() if key}
+        for row in reader
+    ]
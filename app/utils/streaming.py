@@ -0,0 +1,30 @@
+from typing import AsyncIterator, Type
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncResult, AsyncScalarResult
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Rows fetched from the server-side cursor per round trip
+STREAM_BATCH_SIZE = 500
+
+
+async def ndjson_lines(
+    result: "AsyncResult | AsyncScalarResult", model: Type[BaseModel]
+) -> AsyncIterator[str]:
+    """Serialize a streamed result one batch at a time, one JSON document per line."""
+    async for batch in result.partitions(STREAM_BATCH_SIZE):
+        yield "".join(
+            model.model_validate(row, from_attributes=True).model_dump_json() + "\n" for row in batch
+        )
+
+
+async def ndjson_items(items: AsyncIterator, model: Type[BaseModel]) -> AsyncIterator[str]:
+    """Serialize already-grouped items (dicts or objects), one JSON document per line."""
+    async for item in items:
+        yield model.model_validate(item, from_attributes=True).model_dump_json() + "\n"
+
+
+def ndjson_response(lines: AsyncIterator[str]) -> StreamingResponse:
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+import os
+import tempfile
+from typing import NamedTuple, Optional
+
+from fastapi import HTTPException, UploadFile
+
+from app.core.settings import settings
+
+
+class StoredUpload(NamedTuple):
+    path: str
+    sha256: str
+    size: int
+
+
+def _write_chunk(fh, digest, chunk: bytes):
+    digest.update(chunk)
+    fh.write(chunk)
+
+
+def _finish(fh, tmp_path: str, path: str):
+    fh.flush()
+    os.fsync(fh.fileno())
+    fh.close()
+    os.replace(tmp_path, path)
+
+
+def _discard(fh, tmp_path: str):
+    fh.close()
+    try:
+        os.unlink(tmp_path)
+    except FileNotFoundError:
+        pass
+
+
+async def save_upload(
+    file: UploadFile, path: str, max_bytes: Optional[int] = None, chunk_size: Optional[int] = None
+) -> StoredUpload:
+    """
+    Stream `file` to `path` without holding it in memory.
+
+    Chunks go to a temporary file in the destination directory and are
+    hashed (SHA-256) on the way; file IO and hashing run in worker threads
+    so the event loop keeps serving other requests. Once complete the file
+    is fsynced and renamed over `path` in one step, so readers never see a
+    partial file. More than `max_bytes` is refused with 413 and nothing is
+    left behind.
+    """
+    max_bytes = max_bytes or settings.UPLOAD_MAX_BYTES
+    chunk_size = chunk_size or settings.UPLOAD_CHUNK_SIZE
+    if file.size is not None and file.size > max_bytes:
+        raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes} bytes")
+
+    directory = os.path.dirname(path) or "."
+    await asyncio.to_thread(os.makedirs, directory, exist_ok=True)
+    fh = await asyncio.to_thread(
+        tempfile.NamedTemporaryFile, dir=directory, prefix=".upload-", suffix=".part", delete=False
+    )
+    digest, size = hashlib.sha256(), 0
+    try:
+        while chunk := await file.read(chunk_size):
+            size += len(chunk)
+            if size > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File exceeds {max_bytes} bytes")
+            await asyncio.to_thread(_write_chunk, fh, digest, chunk)
+        await asyncio.to_thread(_finish, fh, fh.name, path)
+    except BaseException:
+        await asyncio.shield(asyncio.to_thread(_discard, fh, fh.name))
+        raise
+    return StoredUpload(path, digest.hexdigest(), size)
@@ -0,0 +1,41 @@
+"""Add payment daily rollups
+
+Revision ID: 12a44a63d37e
+Revises: 8c37a1fcb55c
+Create Date: 2026-10-18 10:04:17.208815
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '12a44a63d37e'
+down_revision = '8c37a1fcb55c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payment_daily_rollups',
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('method', postgresql.ENUM('cash', 'bank_transfer', 'bkash', name='paymentmethod', create_type=False), nullable=False),
+    sa.Column('total_received', sa.Float(), nullable=False),
+    sa.Column('total_discount', sa.Float(), nullable=False),
+    sa.Column('payment_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('day', 'client_id', 'method')
+    )
+
+    # Backfill from existing payments (same as app.scripts.rebuild_payment_aggregates)
+    op.execute("""
+        INSERT INTO payment_daily_rollups (day, client_id, method, total_received, total_discount, payment_count)
+        SELECT date, client_id, method, COALESCE(SUM(received_amount), 0), COALESCE(SUM(discount), 0), COUNT(id)
+        FROM payments GROUP BY date, client_id, method
+    """)
+
+
+def downgrade():
+    op.drop_table('payment_daily_rollups')
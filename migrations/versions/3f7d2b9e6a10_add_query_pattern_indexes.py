@@ -0,0 +1,48 @@
+"""Add query pattern indexes
+
+Revision ID: 3f7d2b9e6a10
+Revises: 12a44a63d37e
+Create Date: 2026-10-18 10:41:52.730164
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f7d2b9e6a10'
+down_revision = '12a44a63d37e'
+branch_labels = None
+depends_on = None
+
+# (name, table, columns, partial index predicate)
+INDEXES = [
+    ('ix_payments_client_id_date', 'payments', ['client_id', 'date'], None),
+    ('ix_payments_date_id', 'payments', ['date', 'id'], None),
+    ('ix_service_assignments_active_client_id', 'service_assignments', ['client_id', 'id'], 'status IS true'),
+    ('ix_service_assignments_service_id', 'service_assignments', ['service_id'], None),
+    ('ix_services_name', 'services', ['name'], None),
+    ('ix_invoices_client_id_created_date_id', 'invoices', ['client_id', 'created_date', 'id'], None),
+    ('ix_invoices_created_date_id', 'invoices', ['created_date', 'id'], None),
+    ('ix_users_clients_id', 'users', ['id'], "role = 'client'"),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and does not
+    # block writes while it builds. IF NOT EXISTS makes a rerun after a failed
+    # build a no-op; an INVALID leftover index must be dropped by hand first.
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,42 @@
+"""Make invoice created_date not null
+
+Revision ID: 88671e92fb15
+Revises: c5d8e2f14a97
+Create Date: 2026-10-18 18:05:11.204377
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '88671e92fb15'
+down_revision = 'c5d8e2f14a97'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # The invoice listing pages on (created_date, id); a NULL key would drop
+    # the row from every page after the first. Undated rows are given the
+    # oldest date on record, so they list after every dated invoice.
+    op.execute(
+        "UPDATE invoices SET created_date = "
+        "COALESCE((SELECT min(created_date) FROM invoices), CURRENT_DATE) "
+        "WHERE created_date IS NULL"
+    )
+    op.alter_column(
+        'invoices', 'created_date',
+        existing_type=sa.Date(),
+        nullable=False,
+        server_default=sa.text('CURRENT_DATE'),
+    )
+
+
+def downgrade():
+    op.alter_column(
+        'invoices', 'created_date',
+        existing_type=sa.Date(),
+        nullable=True,
+        server_default=None,
+    )
@@ -0,0 +1,52 @@
+"""Add payment aggregate tables
+
+Revision ID: 8c37a1fcb55c
+Revises: 5a4acb91172d
+Create Date: 2026-10-18 09:12:40.512301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '8c37a1fcb55c'
+down_revision = '5a4acb91172d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('payment_client_totals',
+    sa.Column('client_id', sa.Integer(), nullable=False),
+    sa.Column('total_received', sa.Float(), nullable=False),
+    sa.Column('total_discount', sa.Float(), nullable=False),
+    sa.Column('payment_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['client_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('client_id')
+    )
+    op.create_table('payment_method_totals',
+    sa.Column('method', postgresql.ENUM('cash', 'bank_transfer', 'bkash', name='paymentmethod', create_type=False), nullable=False),
+    sa.Column('total_received', sa.Float(), nullable=False),
+    sa.Column('total_discount', sa.Float(), nullable=False),
+    sa.Column('payment_count', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('method')
+    )
+
+    # Backfill from existing payments (same as app.scripts.rebuild_payment_aggregates)
+    op.execute("""
+        INSERT INTO payment_client_totals (client_id, total_received, total_discount, payment_count)
+        SELECT client_id, COALESCE(SUM(received_amount), 0), COALESCE(SUM(discount), 0), COUNT(id)
+        FROM payments GROUP BY client_id
+    """)
+    op.execute("""
+        INSERT INTO payment_method_totals (method, total_received, total_discount, payment_count)
+        SELECT method, COALESCE(SUM(received_amount), 0), COALESCE(SUM(discount), 0), COUNT(id)
+        FROM payments GROUP BY method
+    """)
+
+
+def downgrade():
+    op.drop_table('payment_method_totals')
+    op.drop_table('payment_client_totals')
@@ -0,0 +1,113 @@
+"""Partition payments by month (opt-in)
+
+Not applied by `alembic upgrade main@head`. Opt in with:
+
+    alembic upgrade payments_partitioning@head
+
+Converts `payments` to a table range-partitioned on `date`, with one
+partition per month that has data, the next few months, and a default
+partition. Further months are created by
+app.services.payment_partitions (app startup and
+app.scripts.maintain_payment_partitions). The table is locked for the
+duration of the copy.
+
+The primary key becomes (id, date) because a partitioned table's unique
+constraints must include the partition key; id still comes from the same
+sequence.
+
+Revision ID: b7e41c09d2f5
+Revises:
+Create Date: 2026-10-18 11:26:03.518442
+
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e41c09d2f5'
+down_revision = None
+branch_labels = ('payments_partitioning',)
+depends_on = '3f7d2b9e6a10'
+
+MONTHS_AHEAD = 3
+
+# Same as the unpartitioned table (see 5a4acb91172d and 3f7d2b9e6a10)
+INDEXES = [
+    ('ix_payments_id', ['id']),
+    ('ix_payments_client_id_date', ['client_id', 'date']),
+    ('ix_payments_date_id', ['date', 'id']),
+]
+
+
+def _add_months(d, months):
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _months(first, last):
+    month = first
+    while month <= last:
+        yield month
+        month = _add_months(month, 1)
+
+
+def upgrade():
+    op.execute("LOCK TABLE payments IN ACCESS EXCLUSIVE MODE")
+
+    op.execute("CREATE TABLE payments_partitioned (LIKE payments INCLUDING DEFAULTS) PARTITION BY RANGE (date)")
+    op.execute("ALTER TABLE payments_partitioned ADD CONSTRAINT payments_partitioned_pkey PRIMARY KEY (id, date)")
+    op.execute("ALTER TABLE payments_partitioned ADD CONSTRAINT payments_partitioned_client_id_fkey "
+               "FOREIGN KEY (client_id) REFERENCES users (id)")
+    op.execute("ALTER TABLE payments_partitioned ADD CONSTRAINT payments_partitioned_received_by_id_fkey "
+               "FOREIGN KEY (received_by_id) REFERENCES users (id)")
+
+    this_month = date.today().replace(day=1)
+    if op.get_context().as_sql:
+        # Offline (--sql): no data to look at; older rows go to the default partition
+        first = this_month
+    else:
+        first = op.get_bind().scalar(
+            sa.text("SELECT date_trunc('month', min(date))::date FROM payments")
+        ) or this_month
+    for month in _months(min(first, this_month), _add_months(this_month, MONTHS_AHEAD)):
+        op.execute(
+            f"CREATE TABLE payments_y{month.year:04d}m{month.month:02d} PARTITION OF payments_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+        )
+    op.execute("CREATE TABLE payments_default PARTITION OF payments_partitioned DEFAULT")
+
+    op.execute("INSERT INTO payments_partitioned SELECT * FROM payments")
+    op.execute("ALTER SEQUENCE payments_id_seq OWNED BY payments_partitioned.id")
+    op.execute("DROP TABLE payments")
+
+    op.execute("ALTER TABLE payments_partitioned RENAME TO payments")
+    op.execute("ALTER TABLE payments RENAME CONSTRAINT payments_partitioned_pkey TO payments_pkey")
+    op.execute("ALTER TABLE payments RENAME CONSTRAINT payments_partitioned_client_id_fkey TO payments_client_id_fkey")
+    op.execute("ALTER TABLE payments RENAME CONSTRAINT payments_partitioned_received_by_id_fkey "
+               "TO payments_received_by_id_fkey")
+    # Created on the parent, cascaded to every partition (CONCURRENTLY is not
+    # supported on partitioned tables; the table is locked anyway)
+    for name, columns in INDEXES:
+        op.create_index(name, 'payments', columns, unique=False)
+    op.execute("ANALYZE payments")
+
+
+def downgrade():
+    # Back to a single heap; detached partitions are not brought back
+    op.execute("LOCK TABLE payments IN ACCESS EXCLUSIVE MODE")
+    op.execute("CREATE TABLE payments_unpartitioned (LIKE payments INCLUDING DEFAULTS)")
+    op.execute("INSERT INTO payments_unpartitioned SELECT * FROM payments")
+    op.execute("ALTER SEQUENCE payments_id_seq OWNED BY payments_unpartitioned.id")
+    op.execute("DROP TABLE payments CASCADE")
+
+    op.execute("ALTER TABLE payments_unpartitioned RENAME TO payments")
+    op.execute("ALTER TABLE payments ADD CONSTRAINT payments_pkey PRIMARY KEY (id)")
+    op.execute("ALTER TABLE payments ADD CONSTRAINT payments_client_id_fkey "
+               "FOREIGN KEY (client_id) REFERENCES users (id)")
+    op.execute("ALTER TABLE payments ADD CONSTRAINT payments_received_by_id_fkey "
+               "FOREIGN KEY (received_by_id) REFERENCES users (id)")
+    for name, columns in INDEXES:
+        op.create_index(name, 'payments', columns, unique=False)
@@ -0,0 +1,30 @@
+"""Add invoice file hash and size
+
+Revision ID: c5d8e2f14a97
+Revises: 3f7d2b9e6a10
+Create Date: 2026-10-18 15:12:40.531907
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d8e2f14a97'
+down_revision = '3f7d2b9e6a10'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column('invoices', sa.Column('file_sha256', sa.String(length=64), nullable=True))
+    op.add_column('invoices', sa.Column('file_size', sa.BigInteger(), nullable=True))
+    op.create_index(op.f('ix_invoices_file_sha256'), 'invoices', ['file_sha256'], unique=False)
+    # Existing files are moved into the content-addressed store (and these
+    # columns filled in) by app.scripts.migrate_invoice_files
+
+
+def downgrade():
+    op.drop_index(op.f('ix_invoices_file_sha256'), table_name='invoices')
+    op.drop_column('invoices', 'file_size')
+    op.drop_column('invoices', 'file_sha256')
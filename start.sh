@@ -10,7 +10,8 @@ until PGPASSWORD=$DB_PASSWORD psql -h "$DB_HOST" -U "$DB_USER" -d "$DB_NAME" -c
 done
 
 echo "Postgres is up - running migrations"
-alembic upgrade head
+# "main" only: optional branches (e.g. payments_partitioning) are applied by hand
+alembic upgrade main@head
 
 echo "Starting FastAPI..."
 exec uvicorn app.main:app --host 0.0.0.0 --port 8000 --reload
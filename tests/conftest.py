@@ -0,0 +1,99 @@
+"""
+Shared fixtures. Tests run without PostgreSQL or Redis: the app is
+imported with placeholder settings, every Redis client is a fakeredis
+client on one in-process server, and databases are in-memory SQLite.
+"""
+import os
+
+for name, value in {
+    "DB_USER": "test", "DB_PASSWORD": "test", "DB_HOST": "localhost", "DB_PORT": "5432", "DB_NAME": "test",
+    "SECRET_KEY": "test-secret", "ALGORITHM": "HS256",
+    "ACCESS_TOKEN_EXPIRE_MINUTES": "30", "REFRESH_TOKEN_EXPIRE_MINUTES": "60",
+    "REDIS_URL": "redis://localhost:6379/0",
+}.items():
+    os.environ.setdefault(name, value)
+
+import fakeredis  # noqa: E402
+import pytest  # noqa: E402
+import redis  # noqa: E402
+import redis.asyncio  # noqa: E402
+
+# Before any app module creates its clients
+_redis_server = fakeredis.FakeServer()
+redis.Redis.from_url = classmethod(lambda cls, url, **kw: fakeredis.FakeRedis(server=_redis_server, **kw))
+redis.asyncio.Redis.from_url = classmethod(
+    lambda cls, url, **kw: fakeredis.FakeAsyncRedis(server=_redis_server, **kw)
+)
+
+import httpx  # noqa: E402
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine  # noqa: E402
+from sqlalchemy.pool import StaticPool  # noqa: E402
+
+from app.core.database import get_db, get_primary_db, get_read_db  # noqa: E402
+from app.core.redis_client import redis_client  # noqa: E402
+from app.core.security import get_current_user  # noqa: E402
+from app.core.table_versions import VersionedAsyncSession  # noqa: E402
+from app.main import app  # noqa: E402
+from app.models.auth import User, UserRole  # noqa: E402
+from app.models.base import Base  # noqa: E402
+import app.services.service_catalog as service_catalog_module  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture(autouse=True)
+def flush_redis():
+    redis_client.flushall()
+    yield
+
+
+def sqlite_engine():
+    """An in-memory database with the full schema; one shared connection, so every session sees it."""
+    return create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+
+
+@pytest.fixture
+async def engine():
+    engine = sqlite_engine()
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return async_sessionmaker(bind=engine, class_=VersionedAsyncSession, autoflush=False, expire_on_commit=False)
+
+
+@pytest.fixture
+async def admin(session_factory):
+    async with session_factory() as db:
+        user = User(name="Admin", email="admin@example.com", password="x", role=UserRole.admin)
+        db.add(user)
+        await db.commit()
+    return user
+
+
+@pytest.fixture
+async def client(session_factory, admin, monkeypatch):
+    """The app on the test database, authenticated as `admin`."""
+    monkeypatch.setattr(service_catalog_module, "AsyncSessionLocal", session_factory)
+    service_catalog_module.service_catalog.invalidate()
+
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_read_db] = override_db
+    app.dependency_overrides[get_primary_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: admin
+    try:
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            yield client
+    finally:
+        app.dependency_overrides.clear()
@@ -0,0 +1,88 @@
+"""
+Bulk payment import: rows are loaded in one go and the running totals
+follow, however many distinct aggregate rows the import touches.
+"""
+import csv
+import io
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.core.security import TokenData, get_current_user
+from app.main import app
+from app.models.auth import User, UserRole
+from app.models.payments import Payment, PaymentClientTotal, PaymentDailyRollup
+
+pytestmark = pytest.mark.anyio
+
+# asyncpg's limit on bind parameters per statement (SQLite's here is higher)
+MAX_BIND_PARAMS = 32767
+
+
+@pytest.fixture
+def bind_counts(engine):
+    counts = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        if not executemany:
+            counts.append(len(parameters or ()))
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield counts
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+def payments_csv(rows) -> bytes:
+    out = io.StringIO()
+    writer = csv.DictWriter(out, ["date", "received_amount", "discount", "method", "description", "client_id"])
+    writer.writeheader()
+    writer.writerows(rows)
+    return out.getvalue().encode()
+
+
+async def import_file(client, admin, content: bytes):
+    app.dependency_overrides[get_current_user] = lambda: TokenData(username=admin.email)
+    return await client.post(
+        "/api/v1/payments/import", files={"file": ("payments.csv", content, "text/csv")}
+    )
+
+
+async def test_import_more_daily_keys_than_one_statement_can_bind(client, session_factory, admin, bind_counts):
+    # Each daily rollup row takes 6 bind parameters: 6000 distinct
+    # (day, client, method) keys would need 36000 in a single INSERT
+    async with session_factory() as db:
+        buyer = User(name="Buyer", email="buyer@example.com", password="x", role=UserRole.client)
+        db.add(buyer)
+        await db.commit()
+    rows = [
+        {"date": date(2000, 1, 1) + timedelta(days=i), "received_amount": 100, "discount": 1,
+         "method": "Cash", "description": None, "client_id": buyer.id}
+        for i in range(6000)
+    ]
+
+    response = await import_file(client, admin, payments_csv(rows))
+
+    assert response.status_code == 200, response.text
+    assert response.json()["imported"] == 6000
+    assert max(bind_counts) <= MAX_BIND_PARAMS
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count()).select_from(Payment)) == 6000
+        assert await db.scalar(select(func.count()).select_from(PaymentDailyRollup)) == 6000
+        assert await db.scalar(select(func.sum(PaymentDailyRollup.payment_count))) == 6000
+        total = await db.get(PaymentClientTotal, buyer.id)
+        assert (total.payment_count, total.total_received, total.total_discount) == (6000, 600000, 6000)
+
+
+async def test_import_reports_unknown_clients(client, session_factory, admin):
+    response = await import_file(client, admin, payments_csv([
+        {"date": "2025-01-01", "received_amount": 100, "method": "Cash", "client_id": admin.id},
+        {"date": "2025-01-02", "received_amount": "lots", "method": "Cash", "client_id": admin.id},
+    ]))
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert (body["imported"], body["failed"]) == (0, 2)
+    assert [e["row"] for e in body["errors"]] == [1, 2]
+    async with session_factory() as db:
+        assert await db.scalar(select(func.count()).select_from(Payment)) == 0
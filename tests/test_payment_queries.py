@@ -0,0 +1,96 @@
+"""
+Payment listings resolve client and receiver names in the page query:
+the number of SQL statements per request does not grow with the rows.
+"""
+from datetime import date, timedelta
+from typing import List, Optional
+
+import pytest
+from sqlalchemy import event, func, select
+
+from app.core.redis_client import redis_client
+from app.models.auth import User, UserRole
+from app.models.payments import Payment, PaymentMethod
+
+pytestmark = pytest.mark.anyio
+
+START = date(2025, 1, 1)
+
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine.sync_engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine.sync_engine, "before_cursor_execute", count)
+
+
+async def add_payments(session_factory, n: int, client_id: Optional[int] = None) -> List[int]:
+    """
+    n payments, each received by a different staff member and, unless
+    client_id is given, paid by a different client. Returns the client ids.
+    """
+    async with session_factory() as db:
+        first = await db.scalar(select(func.max(User.id))) or 0
+        staff = [User(name=f"Staff {first + i}", email=f"staff{first + i}@example.com", password="x",
+                      role=UserRole.admin) for i in range(n)]
+        clients = [] if client_id else [
+            User(name=f"Client {first + i}", email=f"client{first + i}@example.com", password="x",
+                 role=UserRole.client) for i in range(n)
+        ]
+        db.add_all(staff + clients)
+        await db.flush()
+        client_ids = [client_id] * n if client_id else [c.id for c in clients]
+        db.add_all([
+            Payment(date=START + timedelta(days=i), received_amount=100 + i, method=PaymentMethod.cash,
+                    client_id=client_ids[i], received_by_id=staff[i].id)
+            for i in range(n)
+        ])
+        await db.commit()
+        return client_ids
+
+
+async def statements_for(client, statements, path: str) -> int:
+    statements.clear()
+    response = await client.get(path)
+    assert response.status_code == 200, response.text
+    return len(statements)
+
+
+@pytest.mark.parametrize("path", [
+    "/api/v1/payments/",
+    "/api/v1/payments/?limit=5",
+    "/api/v1/payments/client/{client_id}",
+    "/api/v1/payments/date-range?start_date=2025-01-01&end_date=2025-12-31",
+])
+async def test_list_statements_do_not_grow_with_rows(client, session_factory, statements, path):
+    [client_id] = await add_payments(session_factory, 1)
+    one = await statements_for(client, statements, path.format(client_id=client_id))
+
+    await add_payments(session_factory, 30)
+    await add_payments(session_factory, 30, client_id)
+    redis_client.flushall()  # rows were added behind the cache's back
+    many = await statements_for(client, statements, path.format(client_id=client_id))
+
+    assert many == one
+
+
+async def test_list_returns_names(client, session_factory):
+    [client_id] = await add_payments(session_factory, 1)
+    await add_payments(session_factory, 2, client_id)
+    payments = (await client.get(f"/api/v1/payments/client/{client_id}")).json()
+    assert sorted((p["client_name"], p["received_by_name"]) for p in payments) == [
+        ("Client 1", "Staff 1"), ("Client 1", "Staff 3"), ("Client 1", "Staff 4")
+    ]
+
+
+async def test_detail_is_one_statement(client, session_factory, statements):
+    await add_payments(session_factory, 3)
+    for payment_id in (1, 2, 3):
+        assert await statements_for(client, statements, f"/api/v1/payments/{payment_id}") == 1
+    payment = (await client.get("/api/v1/payments/2")).json()
+    assert (payment["client_name"], payment["received_by_name"]) == ("Client 2", "Staff 2")
@@ -0,0 +1,94 @@
+"""
+get_db sends reads to a replica and writes to the primary, and keeps a
+user who just wrote on the primary. Two SQLite databases stand in for
+the primary and a replica that has not caught up yet.
+"""
+import httpx
+import pytest
+from fastapi import Depends, FastAPI
+from jose import jwt
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+import app.core.database as database
+from app.core.database import get_db, get_read_db
+from app.core.redis_client import redis_client
+from tests.conftest import sqlite_engine
+
+pytestmark = pytest.mark.anyio
+
+routed = FastAPI()
+
+
+@routed.get("/notes")
+async def list_notes(db: AsyncSession = Depends(get_db)):
+    return (await db.scalars(text("SELECT body FROM notes ORDER BY id"))).all()
+
+
+@routed.post("/notes")
+async def add_note(body: str, db: AsyncSession = Depends(get_db)):
+    await db.execute(text("INSERT INTO notes (body) VALUES (:body)"), {"body": body})
+    await db.commit()
+
+
+@routed.post("/notes/preview")
+async def preview_notes(db: AsyncSession = Depends(get_read_db)):
+    return (await db.scalars(text("SELECT body FROM notes ORDER BY id"))).all()
+
+
+def auth(subject: str) -> dict:
+    return {"Authorization": f"Bearer {jwt.encode({'sub': subject}, 'any-key', algorithm='HS256')}"}
+
+
+@pytest.fixture
+async def client(monkeypatch):
+    primary, replica = sqlite_engine(), sqlite_engine()
+    for engine, rows in ((primary, ["on primary"]), (replica, ["on replica"])):
+        async with engine.begin() as conn:
+            await conn.execute(text("CREATE TABLE notes (id INTEGER PRIMARY KEY, body TEXT)"))
+            for body in rows:
+                await conn.execute(text("INSERT INTO notes (body) VALUES (:body)"), {"body": body})
+
+    monkeypatch.setattr(database, "AsyncSessionLocal", async_sessionmaker(bind=primary, expire_on_commit=False))
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [async_sessionmaker(bind=replica, expire_on_commit=False)])
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=routed), base_url="http://test") as client:
+        yield client
+    await primary.dispose()
+    await replica.dispose()
+
+
+async def test_reads_go_to_a_replica(client):
+    assert (await client.get("/notes")).json() == ["on replica"]
+    assert (await client.get("/notes", headers=auth("alice@example.com"))).json() == ["on replica"]
+    assert (await client.post("/notes/preview")).json() == ["on replica"]
+
+
+async def test_writes_go_to_the_primary(client):
+    assert (await client.post("/notes", params={"body": "new"}, headers=auth("alice@example.com"))).status_code == 200
+    assert (await client.post("/notes", params={"body": "anonymous"})).status_code == 200
+    # Nothing reached the replica
+    assert (await client.get("/notes", headers=auth("bob@example.com"))).json() == ["on replica"]
+
+
+async def test_read_your_writes_after_a_write(client):
+    alice, bob = auth("alice@example.com"), auth("bob@example.com")
+    await client.post("/notes", params={"body": "new"}, headers=alice)
+
+    assert redis_client.ttl("db:recent-write:alice@example.com") > 0
+    assert (await client.get("/notes", headers=alice)).json() == ["on primary", "new"]
+    assert (await client.post("/notes/preview", headers=alice)).json() == ["on primary", "new"]
+    # Other users still read from the replica
+    assert (await client.get("/notes", headers=bob)).json() == ["on replica"]
+
+    # Once the window has passed, reads go back to the replica
+    redis_client.delete("db:recent-write:alice@example.com")
+    assert (await client.get("/notes", headers=alice)).json() == ["on replica"]
+
+
+async def test_primary_without_replicas(client, monkeypatch):
+    monkeypatch.setattr(database, "ReplicaSessionLocals", [])
+    assert (await client.get("/notes")).json() == ["on primary"]
+
+    # Writes skip the sticky key: with one database it would change nothing
+    await client.post("/notes", params={"body": "new"}, headers=auth("alice@example.com"))
+    assert not redis_client.exists("db:recent-write:alice@example.com")
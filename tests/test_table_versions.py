@@ -0,0 +1,104 @@
+"""
+Table versions behind the HTTP ETags: bumped after a commit, never from
+inside it, and without letting a slow Redis hold up the request.
+"""
+import asyncio
+import time
+
+import pytest
+
+import app.core.table_versions as table_versions
+from app.core.redis_client import redis_client
+from app.core.table_versions import get_versions
+from app.models.services import Service
+from app.services.service_catalog import service_catalog
+
+pytestmark = pytest.mark.anyio
+
+
+async def add_service(session_factory, name: str, commit: bool = True):
+    async with session_factory() as db:
+        db.add(Service(name=name, created_by="test"))
+        if commit:
+            await db.commit()
+            service_catalog.invalidate()  # as ServiceService does through changed()
+        else:
+            await db.flush()
+            await db.rollback()
+
+
+async def counters(tables):
+    return {table: version.counter for table, version in (await get_versions(tables)).items()}
+
+
+async def test_commit_bumps_written_tables(session_factory):
+    await add_service(session_factory, "Internet")
+    assert await counters(["services", "payments"]) == {"services": 1, "payments": 0}
+
+
+async def test_rollback_does_not_bump(session_factory):
+    await add_service(session_factory, "Internet", commit=False)
+    assert await counters(["services"]) == {"services": 0}
+
+
+async def test_epoch_is_kept_until_redis_loses_it():
+    first = await get_versions(["services"])
+    assert await get_versions(["services"]) == first
+
+    redis_client.flushall()  # as after a restart without persistence
+    assert (await get_versions(["services"]))["services"].epoch != first["services"].epoch
+
+
+async def test_slow_redis_does_not_hold_up_commit(session_factory, monkeypatch):
+    async def stuck(tables):
+        await asyncio.sleep(10)
+
+    monkeypatch.setattr(table_versions, "bump_async", stuck)
+    monkeypatch.setattr(table_versions.settings, "TABLE_VERSION_BUMP_TIMEOUT_SECONDS", 0.05)
+    started = time.monotonic()
+    await add_service(session_factory, "Internet")
+    assert time.monotonic() - started < 1
+
+
+async def test_etag_changes_after_a_write(client, session_factory):
+    first = await client.get("/api/v1/services/")
+    etag = first.headers["etag"]
+    assert (await client.get("/api/v1/services/", headers={"If-None-Match": etag})).status_code == 304
+
+    await add_service(session_factory, "Internet")
+    second = await client.get("/api/v1/services/", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["etag"] != etag
+
+
+async def test_etag_changes_when_redis_restarts(client, session_factory):
+    await add_service(session_factory, "Internet")
+    etag = (await client.get("/api/v1/services/")).headers["etag"]
+
+    # The counter goes back to 0 and climbs to the same value again
+    redis_client.flushall()
+    await add_service(session_factory, "Fiber")
+    response = await client.get("/api/v1/services/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+async def test_etag_follows_the_catalog_not_the_counter(client, session_factory):
+    await add_service(session_factory, "Internet")
+    first = await client.get("/api/v1/services/")
+    etag = first.headers["etag"]
+
+    # Committed (and the version bumped) before this worker's catalog hears of it
+    async with session_factory() as db:
+        service = await db.get(Service, first.json()[0]["id"])
+        service.name = "Fiber"
+        await db.commit()
+    stale = await client.get("/api/v1/services/")
+    assert stale.json()[0]["name"] == "Internet"
+    assert stale.headers["etag"] == etag
+
+    service_catalog.invalidate()
+    fresh = await client.get("/api/v1/services/", headers={"If-None-Match": etag})
+    assert fresh.status_code == 200
+    assert fresh.json()[0]["name"] == "Fiber"
+    assert fresh.headers["etag"] != etag